@@ -1,8 +1,21 @@
-from flask import Flask, render_template_string, send_from_directory, request
+from flask import Flask, Response, send_from_directory, request, url_for
 import json
 import os
 import argparse
+import base64
+import gzip
+import hashlib
 import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+# brotli 是可选依赖：装了才对 API 响应用 br 压缩
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # -----------------------------
 # argparse
@@ -13,7 +26,7 @@ def parse_args():
     parser.add_argument(
         "--data-dir",
         default="data",
-        help="项目数据目录（包含 projects.json 和图片）"
+        help="项目数据目录（包含 projects.json 和图片；即 main.py 的 --output-dir）"
     )
     parser.add_argument(
         "--host",
@@ -42,6 +55,31 @@ def parse_args():
         default=12,
         help="每页展示数量"
     )
+    parser.add_argument(
+        "--thumb-widths",
+        type=int,
+        nargs="+",
+        default=[320, 640, 1024],
+        help="缩略图宽度（需与 main.py --thumb-widths 一致；缩略图由 main.py thumbs 生成）"
+    )
+    parser.add_argument(
+        "--page-window",
+        type=int,
+        default=2,
+        help="分页栏显示当前页前后各 N 页（另加首页和末页）"
+    )
+    parser.add_argument(
+        "--render-cache",
+        type=int,
+        default=256,
+        help="缓存最近渲染过的页面数量（数据变化后自动失效）"
+    )
+    parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=1.0,
+        help="检查 projects.json 是否变化（mtime/size）的最小间隔（秒）"
+    )
 
     return parser.parse_args()
 
@@ -56,6 +94,345 @@ app = Flask(__name__)
 BASE_DIR = os.getcwd()
 DATA_DIR = os.path.join(BASE_DIR, args.data_dir)
 
+
+# -----------------------------
+# Project cache
+# -----------------------------
+def data_relpath(x) -> str:
+    """
+    Local Images 里记录的是 main.py 写入时的路径（<output_dir>/<项目目录>/image_1.png，可能是绝对路径）
+    统一转成相对 DATA_DIR 的路径：/data/... 和 /thumbs/... 都按它查找
+    （缩略图路径规则同 main.py 的 thumbnail_path：相对 --output-dir）
+    """
+    x = str(x).replace("\\", "/")  # 兼容 Windows 反斜杠
+    try:
+        rel = os.path.relpath(os.path.join(BASE_DIR, x), DATA_DIR).replace("\\", "/")
+    except ValueError:             # Windows 跨盘符
+        rel = "../"
+    if not rel.startswith("../"):
+        return rel
+    if x.startswith("data/"):
+        return x[len("data/"):]      # 旧数据：目录改过名，去掉多余的 data/
+    return x
+
+
+def normalize_project(p: dict) -> dict:
+    # 关键：规范化 Local Images，避免 /data/data/... 这种双层路径
+    fixed = [data_relpath(x) for x in p.get("Local Images") or []]
+    return dict(p, **{"Local Images": fixed})
+
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text) -> list:
+    return TOKEN_RE.findall(str(text or "").lower())
+
+
+def project_year(p: dict) -> str:
+    return str(p.get("Year") or "").strip()
+
+
+def project_category(p: dict) -> str:
+    return str(p.get("Category") or "").strip()
+
+
+class SearchIndex:
+    """
+    内存倒排索引（Title / Description / Category），BM25 排序 + 年份 / 分类 facet：
+    - postings：term -> {url: tf}；Title 的词频按 TITLE_BOOST 计
+    - 年份 / 分类各维护 value -> set(url) 和全局计数，无查询时 facet 计数直接用预先算好的 Counter
+    - put / remove 按单个项目增量更新；内容没变（fingerprint 相同）的项目不会重新分词
+    """
+
+    K1 = 1.2
+    B = 0.75
+    TITLE_BOOST = 2
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.doc_len = {}
+        self.total_len = 0
+        self.fingerprints = {}
+        self.terms = {}
+        self.by_year = defaultdict(set)
+        self.by_category = defaultdict(set)
+        self.year_counts = Counter()
+        self.category_counts = Counter()
+        self.pair_counts = Counter()   # (年份, 分类) -> 数量：只按一个 facet 筛选时直接算另一维的计数
+        self.doc_year = {}
+        self.doc_category = {}
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    @staticmethod
+    def fingerprint(p: dict):
+        return (p.get("Title"), p.get("Description"), p.get("Category"), p.get("Year"))
+
+    def put(self, url: str, p: dict):
+        fp = self.fingerprint(p)
+        if self.fingerprints.get(url) == fp:
+            return
+        self.remove(url)
+
+        tf = Counter(tokenize(p.get("Description")) + tokenize(p.get("Category")))
+        for t in tokenize(p.get("Title")):
+            tf[t] += self.TITLE_BOOST
+        for t, n in tf.items():
+            self.postings[t][url] = n
+        length = sum(tf.values())
+
+        self.fingerprints[url] = fp
+        self.terms[url] = list(tf)
+        self.doc_len[url] = length
+        self.total_len += length
+
+        year, category = project_year(p), project_category(p)
+        self.doc_year[url] = year
+        self.doc_category[url] = category
+        self.by_year[year].add(url)
+        self.by_category[category].add(url)
+        self.year_counts[year] += 1
+        self.category_counts[category] += 1
+        self.pair_counts[year, category] += 1
+
+    def remove(self, url: str):
+        if url not in self.doc_len:
+            return
+        for t in self.terms.pop(url):
+            posting = self.postings[t]
+            posting.pop(url, None)
+            if not posting:
+                del self.postings[t]
+        self.total_len -= self.doc_len.pop(url)
+        del self.fingerprints[url]
+
+        year, category = self.doc_year.pop(url), self.doc_category.pop(url)
+        self.by_year[year].discard(url)
+        self.by_category[category].discard(url)
+        self.year_counts[year] -= 1
+        self.category_counts[category] -= 1
+        self.pair_counts[year, category] -= 1
+        if not self.pair_counts[year, category]:
+            del self.pair_counts[year, category]
+        if not self.year_counts[year]:
+            del self.year_counts[year], self.by_year[year]
+        if not self.category_counts[category]:
+            del self.category_counts[category], self.by_category[category]
+
+    def match(self, query: str):
+        """所有词都出现的文档 -> BM25 分数；query 为空时返回 None（不限制）"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return None
+        postings = [self.postings.get(t) for t in terms]
+        if not all(postings):
+            return {}
+
+        n = len(self.doc_len)
+        avgdl = self.total_len / n if n else 1.0
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+
+        scores = dict.fromkeys(candidates, 0.0)
+        for posting in postings:
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for url in candidates:
+                tf = posting[url]
+                norm = self.K1 * (1 - self.B + self.B * self.doc_len[url] / avgdl)
+                scores[url] += idf * tf * (self.K1 + 1) / (tf + norm)
+        return scores
+
+    def facets(self, scores, year=None, category=None):
+        """
+        (年份计数, 分类计数)：每个 facet 的计数考虑查询和“另一个” facet 的筛选（标准的多选 facet 语义）
+        """
+        if scores is None:
+            # 只有筛选：全部来自预先维护的计数，不遍历文档
+            return (
+                Counter({y: n for (y, c), n in self.pair_counts.items() if c == category}) if category else self.year_counts,
+                Counter({c: n for (y, c), n in self.pair_counts.items() if y == year}) if year else self.category_counts,
+            )
+
+        base = scores.keys()
+        in_year = base & self.by_year.get(year, set()) if year else base
+        in_category = base & self.by_category.get(category, set()) if category else base
+        return (
+            Counter(self.doc_year[u] for u in in_category),
+            Counter(self.doc_category[u] for u in in_year),
+        )
+
+
+class ProjectCache:
+    """
+    进程内共享的项目列表 + 搜索索引，只在数据文件变化时更新：
+    - 每个请求最多做一次 stat（且不超过每 interval 秒一次），未变化直接返回
+    - 只有 projects.journal.jsonl 变长：从上次读到的位置接着读新追加的行，逐个项目增量更新索引
+    - projects.json 变化（爬虫合并日志）或日志被截断：重新读快照，按 Project URL 对比，只重建内容变化的项目
+    - 爬虫写 projects.json 是 tmp + os.replace，读到的总是完整文件；日志只取完整的行
+    - 更新在锁内进行，完成后整体替换列表引用：正在渲染的请求继续用旧列表，不会读到一半的数据
+    """
+
+    def __init__(self, data_dir, interval=1.0):
+        self.path = os.path.join(data_dir, "projects.json")
+        self.journal_path = os.path.join(data_dir, "projects.journal.jsonl")
+        self.interval = interval
+        self.version = 0
+        self.index = SearchIndex()
+        self._items = {}
+        self._projects = []
+        self._position = {}
+        self._snapshot_sig = None
+        self._journal_offset = 0
+        self._checked = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+            return st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return None
+
+    def _read_snapshot(self) -> dict:
+        items = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            snapshot = []
+        for i, p in enumerate(snapshot if isinstance(snapshot, list) else []):
+            if isinstance(p, dict):
+                # 没有 Project URL 的旧数据用位置当 key
+                items[p.get("Project URL") or f"#{i}"] = normalize_project(p)
+        return items
+
+    def _read_journal(self, items: dict, offset: int):
+        """
+        把 offset 之后完整的日志行应用到 items（格式见 main.py 的 ProjectStore）
+        返回 (新的 offset, 变化的 URL 集合, 是否有删除)
+        """
+        touched, deleted = set(), False
+        try:
+            with open(self.journal_path, "rb") as f:
+                f.seek(offset)
+                raw = f.read()
+        except FileNotFoundError:
+            return 0, touched, deleted
+        good = raw.rfind(b"\n") + 1   # 正在写的最后一行留到下次
+        for line in raw[:good].decode("utf-8").splitlines():
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if rec.get("op") == "put":
+                url = rec["project"]["Project URL"]
+                items[url] = normalize_project(rec["project"])
+                touched.add(url)
+            elif rec.get("op") == "del" and items.pop(rec.get("url"), None) is not None:
+                touched.add(rec["url"])
+                deleted = True
+        return offset + good, touched, deleted
+
+    def _refresh(self):
+        snapshot_sig = self._stat(self.path)
+        journal_sig = self._stat(self.journal_path)
+        journal_size = journal_sig[1] if journal_sig else 0
+
+        if snapshot_sig != self._snapshot_sig or journal_size < self._journal_offset:
+            # 快照变了：整体重读，索引里只有内容变化的项目会重新分词
+            items = self._read_snapshot()
+            offset, _, _ = self._read_journal(items, 0)
+            for url in self._items.keys() - items.keys():
+                self.index.remove(url)
+            for url, p in items.items():
+                self.index.put(url, p)
+            projects = list(items.values())
+            position = {url: i for i, url in enumerate(items)}
+        elif journal_size > self._journal_offset:
+            # 只是日志变长：只处理新追加的项目
+            items = dict(self._items)
+            offset, touched, deleted = self._read_journal(items, self._journal_offset)
+            if not touched:
+                self._journal_offset = offset
+                return
+            for url in touched:
+                if url in items:
+                    self.index.put(url, items[url])
+                else:
+                    self.index.remove(url)
+            if deleted:
+                projects = list(items.values())
+                position = {url: i for i, url in enumerate(items)}
+            else:
+                projects, position = list(self._projects), dict(self._position)
+                for url in touched:
+                    if url in position:
+                        projects[position[url]] = items[url]
+                    else:
+                        position[url] = len(projects)
+                        projects.append(items[url])
+        else:
+            return
+
+        self._items = items
+        self._projects = projects
+        self._position = position
+        self._snapshot_sig = snapshot_sig
+        self._journal_offset = offset
+        self.version += 1
+
+    def get(self) -> list:
+        now = time.monotonic()
+        if self._checked is not None and now - self._checked < self.interval:
+            return self._projects
+
+        with self._lock:
+            if self._checked is None or now - self._checked >= self.interval:
+                try:
+                    self._refresh()
+                except (OSError, ValueError) as e:
+                    app.logger.warning("projects.json 加载失败，继续使用旧数据：%s", e)
+                self._checked = time.monotonic()
+            return self._projects
+
+    def search(self, query="", year=None, category=None):
+        """
+        -> (项目列表, 年份计数, 分类计数)
+        有查询词时按 BM25 分数排序，否则保持 projects.json 的顺序
+        """
+        self.get()
+        with self._lock:
+            index, items, position = self.index, self._items, self._position
+            scores = index.match(query)
+
+            if scores is None and not year and not category:
+                hits = self._projects
+            else:
+                sets = [] if scores is None else [scores.keys()]
+                if year:
+                    sets.append(index.by_year.get(year, set()))
+                if category:
+                    sets.append(index.by_category.get(category, set()))
+                sets.sort(key=len)
+                urls = set(sets[0]).intersection(*sets[1:])
+                if scores is None and len(urls) * 8 > len(items):
+                    # 命中很多时按原顺序扫一遍比排序快
+                    ordered = [u for u in items if u in urls]
+                elif scores is None:
+                    ordered = sorted(urls, key=position.__getitem__)
+                else:
+                    ordered = sorted(urls, key=lambda u: (-scores[u], position[u]))
+                hits = [items[u] for u in ordered]
+
+            year_counts, category_counts = index.facets(scores, year, category)
+            return hits, dict(year_counts), dict(category_counts)
+
+
+project_cache = ProjectCache(DATA_DIR, args.reload_interval)
+
 HTML = """
 <!DOCTYPE html>
 <html lang="zh">
@@ -88,8 +465,42 @@ HTML = """
     </div>
   </header>
 
+  <!-- Search & facets -->
+  <form method="get" action="/" class="mx-auto max-w-6xl px-4 pt-6 flex flex-col sm:flex-row gap-2">
+    <input
+      type="search"
+      name="q"
+      value="{{ q }}"
+      placeholder="搜索标题 / 描述 / 分类"
+      class="flex-1 rounded-xl border border-slate-200 bg-white px-4 py-2 text-sm shadow-sm focus:outline-none focus:ring-2 focus:ring-slate-400"
+    />
+    <select name="year" onchange="this.form.submit()"
+            class="rounded-xl border border-slate-200 bg-white px-3 py-2 text-sm shadow-sm">
+      <option value="">全部年份</option>
+      {% for y, n in year_facets %}
+      <option value="{{ y }}" {% if y == year %}selected{% endif %}>{{ y }}（{{ n }}）</option>
+      {% endfor %}
+    </select>
+    <select name="category" onchange="this.form.submit()"
+            class="rounded-xl border border-slate-200 bg-white px-3 py-2 text-sm shadow-sm">
+      <option value="">全部分类</option>
+      {% for c, n in category_facets %}
+      <option value="{{ c }}" {% if c == category %}selected{% endif %}>{{ c }}（{{ n }}）</option>
+      {% endfor %}
+    </select>
+    <button type="submit"
+            class="rounded-xl bg-slate-900 px-4 py-2 text-sm font-medium text-white shadow hover:bg-slate-800">
+      搜索
+    </button>
+  </form>
+
   <!-- Main -->
   <main class="mx-auto max-w-6xl px-4 py-8 space-y-6">
+    {% if not projects %}
+    <div class="rounded-2xl border border-dashed border-slate-300 p-10 text-center text-sm text-slate-500">
+      没有匹配的项目
+    </div>
+    {% endif %}
     {% for p in projects %}
     {% set row_id = loop.index %}
     <section class="overflow-hidden rounded-2xl border border-slate-200 bg-white shadow-sm">
@@ -99,15 +510,20 @@ HTML = """
         <div class="md:w-1/2 bg-slate-100">
           {% if p["Local Images"] %}
             <div class="relative w-full">
-              <div class="aspect-[4/3] w-full overflow-hidden">
+              <!-- 卡片里只加载 WebP 缩略图；点击图片才打开原图 -->
+              <a id="orig-{{ row_id }}" href="{{ url_for('data_files', filename=p['Local Images'][0]) }}"
+                 target="_blank" rel="noreferrer" class="block aspect-[4/3] w-full overflow-hidden">
                 <img
                   id="img-{{ row_id }}"
                   class="h-full w-full object-cover"
-                  src="{{ url_for('data_files', filename=p['Local Images'][0]) }}"
+                  src="{{ thumb_src(p['Local Images'][0]) }}"
+                  srcset="{{ thumb_srcset(p['Local Images'][0]) }}"
+                  sizes="(min-width: 768px) 50vw, 100vw"
                   alt="{{ p.Title }}"
                   loading="lazy"
+                  decoding="async"
                 />
-              </div>
+              </a>
 
               {% if p["Local Images"]|length > 1 %}
               <div class="absolute bottom-3 left-3 right-3 flex flex-wrap gap-2">
@@ -188,7 +604,7 @@ HTML = """
       <div class="flex flex-wrap items-center gap-2">
         <!-- Prev -->
         {% if page > 1 %}
-          <a href="/?page={{ page - 1 }}"
+          <a href="{{ page_url(page - 1) }}"
              class="rounded-xl border border-slate-200 bg-white px-3 py-2 text-sm text-slate-700 shadow-sm hover:bg-slate-50">
             ← 上一页
           </a>
@@ -198,15 +614,17 @@ HTML = """
           </span>
         {% endif %}
 
-        <!-- Page numbers (全量显示；数量很大时建议改省略号分页) -->
+        <!-- Page numbers（首页 / 末页 + 当前页前后 N 页，中间用省略号） -->
         <div class="flex flex-wrap items-center gap-1">
           {% for n in page_numbers %}
-            {% if n == page %}
+            {% if n is none %}
+              <span class="px-2 py-2 text-sm text-slate-400">…</span>
+            {% elif n == page %}
               <span class="rounded-lg bg-slate-900 px-3 py-2 text-sm font-medium text-white">
                 {{ n }}
               </span>
             {% else %}
-              <a href="/?page={{ n }}"
+              <a href="{{ page_url(n) }}"
                  class="rounded-lg border border-slate-200 bg-white px-3 py-2 text-sm text-slate-700 hover:bg-slate-50">
                 {{ n }}
               </a>
@@ -216,7 +634,7 @@ HTML = """
 
         <!-- Next -->
         {% if page < total_pages %}
-          <a href="/?page={{ page + 1 }}"
+          <a href="{{ page_url(page + 1) }}"
              class="rounded-xl border border-slate-200 bg-white px-3 py-2 text-sm text-slate-700 shadow-sm hover:bg-slate-50">
             下一页 →
           </a>
@@ -236,46 +654,119 @@ HTML = """
   </footer>
 
   <script>
+    const THUMB_WIDTHS = {{ thumb_widths|tojson }};
+
     function switchImage(rowId, src) {
       const el = document.getElementById("img-" + rowId);
       if (!el) return;
       el.style.opacity = "0.4";
       el.onload = () => { el.style.opacity = "1"; };
-      el.src = "/data/" + src;
+      el.srcset = THUMB_WIDTHS.map(w => "/thumbs/" + w + "/" + src + " " + w + "w").join(", ");
+      el.src = "/thumbs/" + THUMB_WIDTHS[Math.floor(THUMB_WIDTHS.length / 2)] + "/" + src;
+      const link = document.getElementById("orig-" + rowId);
+      if (link) link.href = "/data/" + src;
     }
   </script>
 </body>
 </html>
 """
 
+# -----------------------------
+# Rendering
+# -----------------------------
+THUMB_WIDTHS = sorted(set(args.thumb_widths))
+
+
+@app.template_global()
+def thumb_src(path):
+    # 默认取中间那个宽度；浏览器支持 srcset 时按实际显示宽度挑
+    return url_for("thumb_files", width=THUMB_WIDTHS[len(THUMB_WIDTHS) // 2], filename=path)
+
+
+@app.template_global()
+def thumb_srcset(path):
+    return ", ".join(f"{url_for('thumb_files', width=w, filename=path)} {w}w" for w in THUMB_WIDTHS)
+
+
+# 启动时编译一次（render_template_string 每次请求都会重新编译）
+INDEX_TEMPLATE = app.jinja_env.from_string(HTML)
+
+
+def page_window(page: int, total_pages: int, radius: int) -> list:
+    """[1, None, page-r .. page+r, None, total_pages]；None 表示省略号，长度与总页数无关"""
+    shown = {1, total_pages, *range(max(1, page - radius), min(total_pages, page + radius) + 1)}
+    out = []
+    for n in sorted(shown):
+        if out and n - out[-1] > 1:
+            out.append(None)
+        out.append(n)
+    return out
+
+
+class RenderCache:
+    """
+    渲染好的页面 HTML 的 LRU 缓存，key 里带数据版本（project_cache.version），
+    数据一变旧 key 自然不再命中，随后被挤出
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            html = self._data.get(key)
+            if html is not None:
+                self._data.move_to_end(key)
+            return html
+
+    def put(self, key, html):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = html
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+render_cache = RenderCache(args.render_cache)
+
+
 # -----------------------------
 # Routes
 # -----------------------------
 @app.route("/")
 def index():
-    with open(os.path.join(DATA_DIR, "projects.json"), "r", encoding="utf-8") as f:
-        projects = json.load(f)
+    q = request.args.get("q", "").strip()
+    year = request.args.get("year", "").strip()
+    category = request.args.get("category", "").strip()
 
-    # 关键：规范化 Local Images，避免 /data/data/... 这种双层路径
-    for p in projects:
-        imgs = p.get("Local Images") or []
-        fixed = []
-        for x in imgs:
-            x = str(x).replace("\\", "/")  # 兼容 Windows 反斜杠
-            if x.startswith("data/"):
-                x = x[len("data/"):]      # 去掉多余的 data/
-            fixed.append(x)
-        p["Local Images"] = fixed
+    try:
+        page = int(request.args.get("page", "1"))
+    except ValueError:
+        page = 1
+
+    # 同一数据版本下同样的请求直接返回已渲染的 HTML
+    project_cache.get()
+    key = (project_cache.version, q, year, category, page)
+    html = render_cache.get(key)
+    if html is not None:
+        return html
+
+    # 已加载并规范化好的列表 + 增量维护的倒排索引（文件变化时才更新）
+    projects, year_counts, category_counts = project_cache.search(q, year, category)
+    if year:
+        year_counts.setdefault(year, 0)
+    if category:
+        category_counts.setdefault(category, 0)
 
     # -----------------------------
     # Pagination
     # -----------------------------
     per_page = max(1, args.per_page)
 
-    try:
-        page = int(request.args.get("page", "1"))
-    except ValueError:
-        page = 1
     if page < 1:
         page = 1
 
@@ -288,10 +779,13 @@ def index():
     end = start + per_page
     projects_page = projects[start:end]
 
-    page_numbers = list(range(1, total_pages + 1))
+    page_numbers = page_window(page, total_pages, max(0, args.page_window))
 
-    return render_template_string(
-        HTML,
+    def page_url(n):
+        # 翻页保留搜索词和筛选条件（None 不会出现在 URL 里）
+        return url_for("index", page=n, q=q or None, year=year or None, category=category or None)
+
+    html = INDEX_TEMPLATE.render(
         projects=projects_page,
         title=args.title,
         page=page,
@@ -299,7 +793,129 @@ def index():
         total=total,
         total_pages=total_pages,
         page_numbers=page_numbers,
+        page_url=page_url,
+        thumb_widths=THUMB_WIDTHS,
+        q=q,
+        year=year,
+        category=category,
+        year_facets=sorted(((y, n) for y, n in year_counts.items() if y), reverse=True),
+        category_facets=sorted((c, n) for c, n in category_counts.items() if c),
     )
+    render_cache.put(key, html)
+    return html
+
+
+# -----------------------------
+# JSON API
+# -----------------------------
+API_DEFAULT_LIMIT = 50
+API_MAX_LIMIT = 500
+API_COMPRESS_MIN = 1024   # 小于 1KB 的响应不压缩
+
+
+def encode_cursor(url: str, i: int) -> str:
+    raw = json.dumps({"after": url, "i": i}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return str(data["after"]), int(data["i"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def cursor_start(hits: list, cursor: str) -> int:
+    """
+    游标 = 上一页最后一个项目的 URL（+ 当时的位置作提示）：
+    数据在两次请求之间有增删时也不会重复或跳过项目；URL 已被删除时退回到记录的位置
+    """
+    decoded = decode_cursor(cursor)
+    if decoded is None:
+        return 0
+    url, i = decoded
+    if 0 <= i < len(hits) and hits[i].get("Project URL") == url:
+        return i + 1
+    for j, p in enumerate(hits):
+        if p.get("Project URL") == url:
+            return j + 1
+    return min(max(i, 0), len(hits))
+
+
+def negotiate_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def json_response(payload, extra_headers=None):
+    """
+    紧凑 JSON + 强 ETag（按最终发送的字节计算，不同压缩编码的 ETag 不同）+ gzip/br 压缩
+    If-None-Match 命中时返回 304，不带响应体
+    extra_headers 不参与 ETag：放与内容无关、每次变化都会让所有缓存失效的值
+    """
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    encoding = negotiate_encoding() if len(body) >= API_COMPRESS_MIN else None
+    if encoding == "br":
+        body = brotli.compress(body, quality=5)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=6, mtime=0)
+
+    etag = hashlib.sha1(body).hexdigest()
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "no-cache", **(extra_headers or {})}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304, headers=headers)
+    else:
+        resp = Response(body, mimetype="application/json", headers=headers)
+    resp.set_etag(etag)
+    return resp
+
+
+@app.route("/api/projects")
+def api_projects():
+    """
+    GET /api/projects?q=&year=&category=&limit=50&cursor=&fields=Title,Year
+    -> {"items": [...], "next_cursor": str | null, "total": int}，数据版本在 X-Data-Version 响应头
+    - 排序与首页一致：有 q 时按 BM25，否则按 projects.json 顺序
+    - year / category 与首页筛选相同，按完整值精确匹配（category 是整条面包屑，如 "Product / Lighting"）
+    - fields：逗号分隔的字段投影，不传则返回完整项目
+    """
+    q = request.args.get("q", "").strip()
+    year = request.args.get("year", "").strip()
+    category = request.args.get("category", "").strip()
+
+    try:
+        limit = int(request.args.get("limit", API_DEFAULT_LIMIT))
+    except ValueError:
+        limit = API_DEFAULT_LIMIT
+    limit = min(max(1, limit), API_MAX_LIMIT)
+
+    fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()]
+
+    hits, _, _ = project_cache.search(q, year, category)
+    start = cursor_start(hits, request.args.get("cursor", ""))
+    page = hits[start:start + limit]
+
+    end = start + len(page)
+    next_cursor = encode_cursor(page[-1].get("Project URL") or "", end - 1) if end < len(hits) else None
+
+    if fields:
+        page = [{f: p.get(f) for f in fields} for p in page]
+
+    return json_response({
+        "items": page,
+        "next_cursor": next_cursor,
+        "total": len(hits),
+    }, {"X-Data-Version": str(project_cache.version)})
 
 
 @app.route("/data/<path:filename>")
@@ -307,6 +923,22 @@ def data_files(filename):
     return send_from_directory(DATA_DIR, filename)
 
 
+@app.route("/thumbs/<int:width>/<path:filename>")
+def thumb_files(width, filename):
+    """
+    <data-dir>/_thumbs/<项目目录>/image_1-640.webp（路径规则同 main.py 的 thumbnail_path）
+    filename 是相对 DATA_DIR 的路径（见 data_relpath），所以 --data-dir 需与生成缩略图时的 --output-dir 相同
+    还没生成缩略图时退回原图，页面照常显示
+    URL 不带版本（原图重新链接后缩略图会原地重做），所以不设 max_age：浏览器每次按 ETag / Last-Modified 重新验证，未变化时只是一次 304
+    """
+    if width not in THUMB_WIDTHS:
+        return Response(status=404)
+    thumb = f"_thumbs/{os.path.splitext(filename)[0]}-{width}.webp"
+    if os.path.isfile(os.path.join(DATA_DIR, thumb)):
+        return send_from_directory(DATA_DIR, thumb)
+    return send_from_directory(DATA_DIR, filename)
+
+
 # -----------------------------
 # Run
 # -----------------------------
@@ -4,29 +4,54 @@ import re
 import time
 import json
 import glob
+import gzip
+import shutil
+import hashlib
+import queue
+import random
+import asyncio
 import argparse
+import threading
 import requests
-from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from contextlib import contextmanager
+from urllib.parse import urljoin, urlsplit, parse_qsl, quote
+from html import unescape as html_unescape
+from email.utils import parsedate_to_datetime
 from tqdm import tqdm
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 
-from bs4 import BeautifulSoup, Tag
+from bs4 import BeautifulSoup, NavigableString, Tag
+import lxml.html
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
+from selenium.common.exceptions import WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 
 import re
-from collections import Counter
 from urllib.parse import urljoin
 
 YEAR_RE = re.compile(r"\b(19\d{2}|20[0-3]\d)\b", re.I)
+PROJECT_LINK_XPATH = "//a[contains(@href, '/project/')]"
+# 全文兜底：路径段只允许 URL 非保留字符 + %XX；匹配必须停在路径边界（引号 / 空白 / ? / # 等），
+# 否则像 /project/föo-1 这样的非 ASCII slug 会被截成一个不存在的 /project/f
+_PATH_SEGMENT = r"[A-Za-z0-9._~%-]*[A-Za-z0-9_~%-]"
+PROJECT_HREF_RE = re.compile(
+    r"(?<![\w/.-])(?:https?://[A-Za-z0-9.-]+(?::\d+)?)?"
+    rf"/(?:{_PATH_SEGMENT}/)*project/{_PATH_SEGMENT}/?"
+    r"(?=$|[\s\"'<>\\?#,;)\]}|])",
+    re.I
+)
+_PROJECT_PATH_RE = re.compile(rf"^/(?:{_PATH_SEGMENT}/)*project/{_PATH_SEGMENT}/?$", re.I)
 
 # ===================== argparse =====================
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(
         description="Red Dot Award crawler with search page cache"
     )
@@ -45,23 +70,135 @@ def parse_args():
 
     parser.add_argument(
         "--max-pages",
+        type=parse_max_pages,
+        default=2,
+        help="Number of search pages, or 'auto' to read the page count from the first search page"
+    )
+
+    parser.add_argument(
+        "--split-pages",
+        type=int,
+        default=100,
+        help="With --max-pages auto: split a search larger than this many pages into sub-facets (0 = never split)"
+    )
+
+    parser.add_argument(
+        "--split-field",
+        default="meta_categories",
+        help="Solr filter field used to split large searches into sub-facets"
+    )
+
+    parser.add_argument(
+        "--facet",
+        action="append",
+        default=[],
+        help="Search shard as solr filters added to --search-url, e.g. year:2024 or "
+             "year:2024,meta_categories:/11/@188 (@N = pages for this shard, default --max-pages; @auto to discover). "
+             "Repeatable; shards are collected concurrently and deduplicated"
+    )
+
+    parser.add_argument(
+        "--shard-workers",
+        type=int,
+        default=4,
+        help="Number of facets collected concurrently (they share --browsers and the rate limiter)"
+    )
+
+    parser.add_argument(
+        "--search-backend",
+        choices=["http", "selenium", "auto"],
+        default="auto",
+        help="Search page backend: http (requests/lxml), selenium, auto (http, fallback to selenium)"
+    )
+
+    parser.add_argument(
+        "--browsers",
+        type=int,
+        default=1,
+        help="Number of search pages fetched in parallel (Selenium driver pool size)"
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Stop paging after --stop-after consecutive pages with no project missing from projects.json"
+    )
+
+    parser.add_argument(
+        "--stop-after",
         type=int,
         default=2,
-        help="Number of search pages"
+        help="Consecutive pages without new projects before stopping (--incremental)"
+    )
+
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=None,
+        help="Hours before cached results of the first --fresh-pages search pages are refetched "
+             "(unset: never with a full crawl, always with --incremental)"
+    )
+
+    parser.add_argument(
+        "--fresh-pages",
+        type=int,
+        default=3,
+        help="Leading search pages subject to --cache-ttl (deeper pages always trust the cache)"
+    )
+
+    parser.add_argument(
+        "--page-timeout",
+        type=float,
+        default=15,
+        help="Max seconds to wait for search results to render (Selenium)"
     )
 
     parser.add_argument(
         "--page-wait",
         type=float,
-        default=2.5,
-        help="Wait after each search page load"
+        default=0,
+        help="Extra fixed wait after search results are ready (Selenium)"
+    )
+
+    parser.add_argument(
+        "--lean",
+        action="store_true",
+        help="Lean Chrome profile: block images/fonts/media/3rd-party scripts, batch link extraction"
+    )
+
+    parser.add_argument(
+        "--http-retries",
+        type=int,
+        default=3,
+        help="urllib3 retries for connection errors / 429 / 5xx"
+    )
+
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=4.0,
+        help="Initial requests per second per host (shared by all workers, pages and images)"
+    )
+
+    parser.add_argument(
+        "--min-rate",
+        type=float,
+        default=0.5,
+        help="Lower bound for the adaptive per-host rate"
+    )
+
+    parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=16.0,
+        help="Upper bound for the adaptive per-host rate"
     )
 
     parser.add_argument(
         "--detail-delay",
         type=float,
-        default=0.8,
-        help="Delay after each project detail crawl (per worker)"
+        default=0,
+        help="Extra delay after each project detail crawl (per worker); politeness is handled by --rate"
     )
 
     parser.add_argument(
@@ -77,7 +214,137 @@ def parse_args():
         help="Number of worker threads for detail crawling"
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Refetch every collected project (unchanged pages cost one 304 via the HTML cache)"
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the pending/in-flight URLs of the last run (output-dir/frontier.jsonl) without re-collecting search pages"
+    )
+
+    parser.add_argument(
+        "--no-html-cache",
+        action="store_true",
+        help="Disable the raw detail-page HTML cache (output-dir/html_cache)"
+    )
+
+    parser.add_argument(
+        "--parser",
+        choices=["bs4", "lxml"],
+        default="bs4",
+        help="Detail page parser backend: bs4 (BeautifulSoup) or lxml (lxml.html, faster)"
+    )
+
+    parser.add_argument(
+        "--no-image-store",
+        action="store_true",
+        help="Save images directly in project folders instead of the content-addressed store"
+    )
+
+    parser.add_argument(
+        "--engine",
+        choices=["threads", "async", "pipeline"],
+        default="threads",
+        help="Detail crawl engine: threads (ThreadPoolExecutor), async (aiohttp) or pipeline (staged queues)"
+    )
+
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=2,
+        help="Parse stage threads (--engine pipeline; fetch stage uses --workers)"
+    )
+
+    parser.add_argument(
+        "--image-workers",
+        type=int,
+        default=16,
+        help="Image download stage threads (--engine pipeline)"
+    )
+
+    parser.add_argument(
+        "--stats-interval",
+        type=float,
+        default=10,
+        help="Seconds between queue-depth reports (--engine pipeline, 0 to disable)"
+    )
+
+    parser.add_argument(
+        "--thumbnails",
+        action="store_true",
+        help="After the crawl, generate WebP thumbnails for new/changed images (requires Pillow)"
+    )
+
+    parser.add_argument(
+        "--thumb-widths",
+        type=int,
+        nargs="+",
+        default=[320, 640, 1024],
+        help="Thumbnail widths in pixels"
+    )
+
+    parser.add_argument(
+        "--image-concurrency",
+        type=int,
+        default=64,
+        help="Max concurrent image downloads (--engine async; --workers limits detail pages)"
+    )
+
+    sub = parser.add_subparsers(dest="command")
+
+    p_reparse = sub.add_parser(
+        "reparse",
+        help="Offline: re-run detail parsing over archived HTML (output-dir/html_cache) and rebuild projects.json"
+    )
+    p_reparse.add_argument(
+        "--output-dir",
+        default=argparse.SUPPRESS,
+        help="Output directory"
+    )
+    p_reparse.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of parser processes"
+    )
+
+    p_retry = sub.add_parser(
+        "retry-failed",
+        help="Re-crawl only the URLs recorded as failed in output-dir/frontier.jsonl, with exponential backoff"
+    )
+    p_retry.add_argument(
+        "--output-dir",
+        default=argparse.SUPPRESS,
+        help="Output directory"
+    )
+    p_retry.add_argument(
+        "--max-attempts",
+        type=int,
+        default=5,
+        help="Give up on a URL after this many failed attempts in total"
+    )
+
+    p_thumbs = sub.add_parser(
+        "thumbs",
+        help="Generate WebP thumbnails for every project image under output-dir (incremental)"
+    )
+    p_thumbs.add_argument(
+        "--output-dir",
+        default=argparse.SUPPRESS,
+        help="Output directory"
+    )
+    p_thumbs.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of resize processes"
+    )
+
+    return parser.parse_args(argv)
 
 
 # ===================== 工具 =====================
@@ -89,6 +356,202 @@ def sanitize_name(name: str) -> str:
     return name[:160]
 
 
+# ===================== HTTP 连接池（keep-alive + 重试） =====================
+
+try:
+    import brotli  # noqa: F401  urllib3 有 brotli 时才能解 br
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def _build_http_session(pool_size=10, retries=3):
+    # 429 / 5xx 由 http_get 结合限速器处理，这里只重试连接层错误
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=0,
+        backoff_factor=0.5,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=max(1, int(pool_size)),
+        max_retries=retry,
+        pool_block=False,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Accept-Encoding": ACCEPT_ENCODING,
+        "Connection": "keep-alive",
+    })
+    return session
+
+
+def configure_http_session(pool_size=10, retries=3):
+    """
+    全进程共享一个 requests.Session：
+    - HTTPAdapter 连接池按并发数设置（同一 host 复用 keep-alive 连接，省掉每次 TCP/TLS 握手）
+    - urllib3 Retry：连接错误自动重试（429 / 5xx 见 http_get）
+    """
+    global _http_session
+
+    session = _build_http_session(pool_size, retries)
+    with _http_session_lock:
+        old, _http_session = _http_session, session
+    if old is not None:
+        old.close()
+    return session
+
+
+def http_session():
+    global _http_session
+
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                _http_session = _build_http_session()
+    return _http_session
+
+
+# ===================== 全局限速（按 host 的令牌桶 + 自适应退避） =====================
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HostRateLimiter:
+    """
+    按 host 的令牌桶（GCRA 虚拟调度实现），所有线程 / 协程共享：
+    - reserve(url) 预约一个令牌，返回需要等待的秒数（调用方自己 sleep / await）
+    - 429 / 5xx：速率减半（不低于 min_rate），有 Retry-After 时整个 host 暂停
+      减半有冷却：一个补满周期（burst / rate 秒）内最多降一次，同一批在途请求的连串错误只算一次
+    - 成功：速率线性回升（不超过 max_rate）
+    => 稳态速率收敛到站点能容忍的最高值，而不是固定猜一个 delay
+    """
+
+    def __init__(self, rate=4.0, min_rate=0.5, max_rate=16.0, burst=4, increase=0.05):
+        self.rate = float(rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = max(float(max_rate), self.rate)
+        self.burst = max(1, int(burst))
+        self.increase = float(increase)
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state(self, url):
+        host = urlsplit(url).netloc.lower()
+        st = self._hosts.get(host)
+        if st is None:
+            st = self._hosts[host] = {"rate": self.rate, "next": 0.0, "paused_until": 0.0, "decreased_at": None}
+        return st
+
+    def reserve(self, url) -> float:
+        with self._lock:
+            st = self._state(url)
+            now = time.monotonic()
+            interval = 1.0 / st["rate"]
+            slot = max(st["next"], now - (self.burst - 1) * interval, st["paused_until"])
+            st["next"] = slot + interval
+            return max(0.0, slot - now)
+
+    def acquire(self, url):
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    def on_success(self, url):
+        with self._lock:
+            st = self._state(url)
+            st["rate"] = min(self.max_rate, st["rate"] + self.increase)
+
+    def on_error(self, url, retry_after=None):
+        with self._lock:
+            st = self._state(url)
+            now = time.monotonic()
+            old = st["rate"]
+            last = st["decreased_at"]
+            if last is None or now - last >= self.burst / old:
+                st["rate"] = max(self.min_rate, old * 0.5)
+                st["decreased_at"] = now
+            if retry_after:
+                st["paused_until"] = max(st["paused_until"], now + retry_after)
+        if st["rate"] < old:
+            print(f"🐢 {urlsplit(url).netloc} 降速：{old:.2f} -> {st['rate']:.2f} req/s")
+
+    def current_rate(self, url) -> float:
+        with self._lock:
+            return self._state(url)["rate"]
+
+
+_rate_limiter = HostRateLimiter()
+
+
+def configure_rate_limiter(rate=4.0, min_rate=0.5, max_rate=16.0):
+    global _rate_limiter
+    _rate_limiter = HostRateLimiter(rate=rate, min_rate=min_rate, max_rate=max_rate)
+    return _rate_limiter
+
+
+def rate_limiter():
+    return _rate_limiter
+
+
+def parse_retry_after(value) -> float:
+    """Retry-After 可以是秒数，也可以是 HTTP-date"""
+    if not value:
+        return 0.0
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = parsedate_to_datetime(value)
+        return max(0.0, dt.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def backoff_delay(attempt, base=0.5, cap=60.0) -> float:
+    """指数退避 + jitter"""
+    return min(cap, base * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
+
+def http_get(url, headers, timeout, retries=3, **kwargs):
+    """
+    走共享 Session + 全局限速器的 GET：
+    - 每次请求前按 host 取令牌
+    - 429 / 5xx：通知限速器降速，遵守 Retry-After，指数退避 + jitter 后重试
+    """
+    limiter = rate_limiter()
+    for attempt in range(retries + 1):
+        limiter.acquire(url)
+        r = http_session().get(url, headers=headers, timeout=timeout, **kwargs)
+        if r.status_code in RETRY_STATUSES:
+            retry_after = parse_retry_after(r.headers.get("Retry-After"))
+            limiter.on_error(url, retry_after)
+            if attempt < retries:
+                r.close()
+                time.sleep(max(retry_after, backoff_delay(attempt)))
+                continue
+        else:
+            limiter.on_success(url)
+        r.raise_for_status()
+        return r
+
+
 # ===================== JSON 工具 =====================
 
 def load_json(path, default):
@@ -107,66 +570,364 @@ def save_json(path, data):
 
 # ===================== ✅ 清理 projects.json（新增） =====================
 
-def cleanup_projects_json(projects_path: str) -> int:
+# ✅ 写盘过滤：只有 Description + Images 都非空，才允许保存
+def can_save(data: dict) -> bool:
+    desc = (data.get("Description") or "").strip()
+    imgs = data.get("Images", [])
+    if not desc:
+        return False
+    if (not isinstance(imgs, list)) or (len(imgs) == 0):
+        return False
+    return True
+
+
+def cleanup_projects_json(store) -> int:
     """
-    打开 projects.json，删除不合规项目：
+    删除 projects 中不合规项目（只追加删除记录，不重写整个文件）：
     - Description 为空/全空白
     - Images 不是 list 或为空 list
     返回删除数量
     """
-    projects = load_json(projects_path, [])
-
-    # projects.json 不存在时，load_json 会返回 default（这里是 []），无需清理
-    if not projects:
-        return 0
+    before = len(store)
 
-    if not isinstance(projects, list):
-        print(f"⚠️ projects.json 结构不是 list，跳过清理：{projects_path}")
+    # projects.json 不存在时 store 为空，无需清理
+    if not before:
         return 0
 
-    def is_valid(p: dict) -> bool:
-        if not isinstance(p, dict):
-            return False
-        desc = (p.get("Description") or "").strip()
-        imgs = p.get("Images", [])
-        if not desc:
-            return False
-        if not isinstance(imgs, list) or len(imgs) == 0:
-            return False
-        return True
-
-    before = len(projects)
-    projects = [p for p in projects if is_valid(p)]
-    removed = before - len(projects)
+    removed = store.prune(lambda p: isinstance(p, dict) and can_save(p))
 
     if removed > 0:
-        save_json(projects_path, projects)
-        print(f"🧹 已清理 projects.json：删除 {removed} 条不合规项目（剩余 {len(projects)} 条）")
+        print(f"🧹 已清理 projects.json：删除 {removed} 条不合规项目（剩余 {len(store)} 条）")
     else:
         print(f"✅ projects.json 无需清理（共 {before} 条，全部合规）")
 
     return removed
 
 
-# ===================== Selenium 搜索页抓取（带缓存） =====================
+# ===================== 项目存储（快照 + 追加日志） =====================
 
-def collect_project_links_with_cache(
-    search_url,
-    max_pages,
-    page_wait,
-    headless,
-    user_agent,
-    cache_path
-):
-    cache = load_json(cache_path, [])
-    cache_map = {
-        item["Search Page URL"]: item["Project URLs"]
-        for item in cache
-        if isinstance(item, dict) and "Search Page URL" in item and "Project URLs" in item
-    }
+class ProjectStore:
+    """
+    以 Project URL 为 key 的项目仓库：
+    - projects.json：快照（也是对外导出格式，app.py / summary.py 直接读它）
+    - projects.journal.jsonl：快照之后的增量，每行一条 {"op": "put"|"del", ...}
+    每完成一个项目只追加一行；日志条数超过 max(compact_min, 项目数) 时才整体重写快照并清空日志，
+    总写入量与项目数成线性关系（原来每 5 个项目重写一次整个文件是 O(n²)）
+    打开时 = 读快照 + 重放日志；崩溃留下的半行会被忽略，快照改名后、清空日志前崩溃也只是重放幂等记录
+    """
 
-    all_project_urls = set()
+    def __init__(self, projects_path: str, compact_min: int = 500):
+        self.path = projects_path
+        self.journal_path = os.path.splitext(projects_path)[0] + ".journal.jsonl"
+        self.compact_min = compact_min
+        self._lock = threading.Lock()
+        self._items = {}
+        self._unkeyed = []   # 没有 Project URL 的旧数据：原样保留到导出
+        self._journal = None
+        self._journal_count = 0
+
+        snapshot = load_json(projects_path, [])
+        if not isinstance(snapshot, list):
+            print(f"⚠️ projects.json 结构不是 list，按空仓库处理：{projects_path}")
+            snapshot = []
+        for p in snapshot:
+            url = p.get("Project URL") if isinstance(p, dict) else None
+            if url:
+                self._items[url] = p
+            else:
+                self._unkeyed.append(p)
+
+        self._replay()
+
+    def _replay(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "rb") as f:
+            raw = f.read()
+
+        # ⚠️ 崩溃时写了一半的最后一行：截掉，避免下一条记录接在它后面
+        good = raw.rfind(b"\n") + 1
+        if good < len(raw):
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good)
+
+        for line in raw[:good].decode("utf-8").splitlines():
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if rec.get("op") == "put":
+                self._items[rec["project"]["Project URL"]] = rec["project"]
+            elif rec.get("op") == "del":
+                self._items.pop(rec["url"], None)
+            self._journal_count += 1
+
+    def _append(self, rec: dict):
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        self._journal_count += 1
+        if self._journal_count >= max(self.compact_min, len(self._items)):
+            self._compact_locked()
+
+    def __len__(self):
+        return len(self._items) + len(self._unkeyed)
+
+    def __contains__(self, url):
+        return url in self._items
+
+    def get(self, url, default=None):
+        return self._items.get(url, default)
+
+    def urls(self):
+        return list(self._items)
+
+    def all(self) -> list:
+        """按首次写入顺序返回全部项目（与旧 projects.json 的顺序一致）"""
+        return list(self._items.values()) + self._unkeyed
+
+    def put(self, data: dict):
+        """新增或覆盖一个项目（已有项目保持原来的位置）"""
+        with self._lock:
+            self._items[data["Project URL"]] = data
+            self._append({"op": "put", "project": data})
+
+    def delete(self, url: str):
+        with self._lock:
+            if self._items.pop(url, None) is not None:
+                self._append({"op": "del", "url": url})
+
+    def prune(self, keep) -> int:
+        """删除 keep(p) 为 False 的项目，返回删除数量"""
+        bad = [url for url, p in self._items.items() if not keep(p)]
+        n_unkeyed = len(self._unkeyed)
+        self._unkeyed = [p for p in self._unkeyed if keep(p)]
+        for url in bad:
+            self.delete(url)
+        if len(self._unkeyed) != n_unkeyed:
+            self.compact()
+        return len(bad) + n_unkeyed - len(self._unkeyed)
+
+    def _compact_locked(self):
+        save_json(self.path, self.all())
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        open(self.journal_path, "w").close()
+        self._journal_count = 0
+
+    def compact(self):
+        """把当前内容写成 projects.json 快照并清空日志（即导出）"""
+        with self._lock:
+            self._compact_locked()
+
+    def export(self, path: str = None):
+        """导出完整 projects.json；path 为空时就是 compact()"""
+        if path is None or os.path.abspath(path) == os.path.abspath(self.path):
+            self.compact()
+        else:
+            save_json(path, self.all())
+
+    def close(self):
+        with self._lock:
+            if self._journal_count:
+                self._compact_locked()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
+# ===================== 抓取进度（crawl frontier） =====================
+
+FRONTIER_STATES = ("pending", "in_flight", "done", "failed")
+
+
+class CrawlFrontier:
+    """
+    每个详情页 URL 的抓取状态，持久化到 output-dir/frontier.jsonl（每次状态变化追加一行，后写覆盖先写）：
+    {"url", "state": pending|in_flight|done|failed, "attempts", "error", "at"}
+    - 进程中途退出后，in_flight 在下次打开时视为 pending（--resume 会重新抓它们）
+    - failed 记录尝试次数与最后的错误，供 retry-failed 按退避重放
+    - 线程安全：on_start 会在抓取线程里调用
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._items = {}
+        self._lines = 0
+        self._f = None
+
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                raw = f.read()
+            good = raw.rfind(b"\n") + 1
+            for line in raw[:good].decode("utf-8").splitlines():
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                self._items[rec["url"]] = rec
+                self._lines += 1
+            if good < len(raw):
+                # ⚠️ 崩溃时写了一半的最后一行
+                with open(path, "r+b") as f:
+                    f.truncate(good)
+
+        for rec in self._items.values():
+            if rec["state"] == "in_flight":
+                rec["state"] = "pending"
+
+    def _set(self, url, state, **fields):
+        with self._lock:
+            rec = dict(self._items.get(url) or {"url": url, "attempts": 0, "error": ""})
+            rec.update(fields, state=state, at=time.time())
+            self._items[url] = rec
+            if self._f is None:
+                self._f = open(self.path, "a", encoding="utf-8")
+            self._f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._f.flush()
+            self._lines += 1
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, url):
+        return self._items.get(url)
+
+    def urls(self, *states) -> list:
+        """按最早入队顺序返回处于给定状态的 URL"""
+        return [u for u, rec in self._items.items() if rec["state"] in states]
+
+    def counts(self) -> dict:
+        c = Counter(rec["state"] for rec in self._items.values())
+        return {state: c.get(state, 0) for state in FRONTIER_STATES}
+
+    def enqueue(self, urls, refetch=False):
+        """
+        本轮要抓的 URL 记为 pending（保留历史尝试次数）
+        refetch=True：下次抓取不发条件请求（HTML 缓存里的页面已经解析过，304 会让新图片永远下不来）
+        """
+        fields = {"refetch": True} if refetch else {}
+        for url in urls:
+            rec = self._items.get(url)
+            if rec is None or rec["state"] != "pending" or (refetch and not rec.get("refetch")):
+                self._set(url, "pending", **fields)
+
+    def wants_refetch(self, url) -> bool:
+        rec = self._items.get(url)
+        return bool(rec and rec.get("refetch"))
+
+    def start(self, url):
+        self._set(url, "in_flight")
+
+    def done(self, url):
+        fields = {"refetch": False} if self.wants_refetch(url) else {}
+        self._set(url, "done", error="", **fields)
+
+    def fail(self, url, error):
+        rec = self._items.get(url) or {}
+        self._set(url, "failed", attempts=rec.get("attempts", 0) + 1, error=str(error)[:500])
+
+    def retry_due(self, rec, base=5.0, cap=600.0) -> float:
+        """失败 URL 下次可重试的时间：最后一次失败后按尝试次数指数退避（5s, 10s, 20s ... 上限 10 分钟）"""
+        return rec["at"] + min(cap, base * (2 ** max(0, rec["attempts"] - 1)))
+
+    def close(self):
+        """关闭日志；重复记录过多时原子地压缩成每个 URL 一行"""
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+            if self._lines > 2 * len(self._items) + 100:
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    for rec in self._items.values():
+                        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                os.replace(tmp_path, self.path)
+                self._lines = len(self._items)
+
+
+# ===================== 搜索页抓取（带缓存） =====================
+
+SEARCH_BACKENDS = ("http", "selenium", "auto")
+
+
+def _project_urls_from_html(html: str, page_url: str) -> list:
+    """
+    从搜索页 HTML（服务端渲染 或 solr/AJAX 返回片段）中提取 /project/ 链接
+    - 先走 lxml 的 <a href>
+    - 一个都没有时才兜底正则扫全文（覆盖内嵌 JSON / data-* 属性里的链接）
+    所有 URL 都经 canonical_project_url 归一，同一项目只出现一次
+    """
+    urls = set()
+    if not html:
+        return []
+
+    try:
+        doc = lxml.html.fromstring(html)
+        for href in doc.xpath(PROJECT_LINK_XPATH + "/@href"):
+            urls.add(canonical_project_url(urljoin(page_url, href.strip())))
+    except Exception:
+        pass
+    urls.discard("")
+
+    if not urls:
+        # 内嵌 JSON 里的 \/ 、\u002F 和属性里的 &quot; / &amp; 先还原，再按干净的路径字符匹配
+        text = html_unescape(re.sub(r"\\u002[fF]", "/", html).replace("\\/", "/"))
+        for m in PROJECT_HREF_RE.finditer(text):
+            urls.add(canonical_project_url(urljoin(page_url, m.group(0))))
+        urls.discard("")
+
+    return sorted(urls)
 
+
+def canonical_project_url(url: str) -> str:
+    """
+    项目链接的唯一形式：去掉 query / fragment 和结尾的 /，非 ASCII 路径字符按 UTF-8 百分号编码（与浏览器的 a.href 一致）
+    不是项目页链接时返回 ""
+    """
+    parts = urlsplit((url or "").strip())
+    path = re.sub(r"[^\x00-\x7f]+", lambda m: quote(m.group(0)), parts.path).rstrip("/")
+    url = f"{parts.scheme}://{parts.netloc}{path}"
+    return url if _is_project_url(url) else ""
+
+
+def _is_project_url(url: str) -> bool:
+    """http(s)、有主机名、路径形如 /…/project/<slug>，且不含引号 / 反斜杠 / 空白等转义残留"""
+    if re.search(r"[\s\"'<>\\]", url):
+        return False
+    parts = urlsplit(url)
+    return parts.scheme in ("http", "https") and bool(parts.netloc) and bool(_PROJECT_PATH_RE.match(parts.path))
+
+
+def fetch_search_page_http(page_url, headers, timeout=20) -> list:
+    r = http_get(page_url, headers, timeout)
+    return _project_urls_from_html(r.text, page_url)
+
+
+# lean 模式：不加载图片/字体/媒体/第三方脚本（搜索页只需要结果列表的 <a href>）
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.avif",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.m4a", "*.ogg",
+    "*eID=tx_solr_image*",
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+    "*facebook.net*", "*facebook.com/tr*", "*hotjar.com*", "*linkedin.com*",
+    "*youtube.com*", "*ytimg.com*", "*vimeo.com*", "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+]
+
+# 一次 execute_script 拿到全部项目链接（替代每个元素多次 get_attribute 的 WebDriver 往返）
+JS_PROJECT_HREFS = """
+return Array.from(document.querySelectorAll('a[href*="/project/"]'), a => a.href);
+"""
+JS_PROJECT_COUNT = """
+return document.querySelectorAll('a[href*="/project/"]').length;
+"""
+
+
+def create_chrome_driver(headless, user_agent, lean=False):
     options = webdriver.ChromeOptions()
     if headless:
         options.add_argument("--headless=new")
@@ -175,83 +936,759 @@ def collect_project_links_with_cache(
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument(f"user-agent={user_agent}")
 
+    if lean:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+
     driver = webdriver.Chrome(
         service=Service(ChromeDriverManager().install()),
         options=options
     )
 
-    try:
-        for page in tqdm(range(1, max_pages + 1)):
-            page_url = f"{search_url}&solr%5Bpage%5D={page}"
+    if lean:
+        # CDP 请求拦截：字体/媒体/第三方脚本在网络层直接丢弃
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+        except Exception as e:
+            print(f"⚠️ lean 模式 CDP 拦截不可用，仅禁用图片: {e}")
 
-            # ✅ 命中缓存
-            if page_url in cache_map:
-                print(f"📦 使用缓存搜索页 {page}")
-                urls = cache_map[page_url]
-                all_project_urls.update(urls)
-                continue
+    return driver
 
-            print(f"📄 抓取搜索页 {page}: {page_url}")
-            driver.get(page_url)
-            time.sleep(page_wait)
 
-            elems = driver.find_elements(By.XPATH, "//a[contains(@href, '/project/')]")
-            urls = sorted({
-                e.get_attribute("href").split("#")[0]
-                for e in elems
-                if e.get_attribute("href") and "/project/" in e.get_attribute("href")
-            })
+def wait_for_search_results(driver, timeout, poll=0.25, lean=False):
+    """
+    自适应等待搜索结果渲染完成（替代固定 sleep）：
+    - 页面里出现 /project/ 链接，且连续两次轮询数量一致 -> 认为就绪
+    - 超过 timeout 仍未就绪 -> 返回当前数量（可能为 0）
+    返回 (链接数, 等待秒数)
+    """
+    start = time.monotonic()
+    last = -1
+    while True:
+        if lean:
+            n = int(driver.execute_script(JS_PROJECT_COUNT) or 0)
+        else:
+            n = len(driver.find_elements(By.XPATH, PROJECT_LINK_XPATH))
+        elapsed = time.monotonic() - start
+        if n > 0 and n == last:
+            return n, elapsed
+        if elapsed >= timeout:
+            return n, elapsed
+        last = n
+        time.sleep(poll)
+
+
+def fetch_search_page_selenium(driver, page_url, page_timeout, page_wait=0, lean=False) -> list:
+    driver.get(page_url)
+    n, _ = wait_for_search_results(driver, page_timeout, lean=lean)
+    if n == 0:
+        # 🚫 超时仍无结果：抛错而不是悄悄返回空列表
+        raise TimeoutError(f"search results not ready after {page_timeout}s")
+    if page_wait and page_wait > 0:
+        time.sleep(page_wait)
+
+    if lean:
+        hrefs = driver.execute_script(JS_PROJECT_HREFS) or []
+    else:
+        hrefs = [e.get_attribute("href") for e in driver.find_elements(By.XPATH, PROJECT_LINK_XPATH)]
+    return sorted({canonical_project_url(h) for h in hrefs if h} - {""})
 
-            print(f"  ➜ 页面中发现 {len(urls)} 个项目")
 
-            if urls:
-                cache.append({
-                    "Search Page URL": page_url,
-                    "Project URLs": urls
-                })
-                cache_map[page_url] = urls
-                save_json(cache_path, cache)
-
-            all_project_urls.update(urls)
-    finally:
-        driver.quit()
+def summarize_load_times(stats: list) -> dict:
+    """per-page 加载耗时统计：stats 为 [{"Page": n, "Seconds": s, "Backend": b}, ...]"""
+    secs = sorted(x["Seconds"] for x in stats)
+    if not secs:
+        return {"count": 0}
+    return {
+        "count": len(secs),
+        "min": round(secs[0], 3),
+        "avg": round(sum(secs) / len(secs), 3),
+        "p95": round(secs[min(len(secs) - 1, int(len(secs) * 0.95))], 3),
+        "max": round(secs[-1], 3),
+    }
 
-    return sorted(all_project_urls)
 
+class BrowserPool:
+    """
+    Selenium driver 池：最多 size 个 Chrome，按需创建、创建后复用，用完归还
+    - 多线程共享；同一时刻一个 driver 只被一个线程借用
+    - 借用期间抛出 WebDriverException 的 driver（崩溃 / 会话失效）不再归还：quit 掉并空出名额，
+      下一个借用者会新建一个
+    - close() 统一 quit
+    """
 
-# ===================== 详情解析 =====================
+    def __init__(self, size, headless, user_agent, lean=False):
+        self.size = max(1, int(size or 1))
+        self.headless = headless
+        self.user_agent = user_agent
+        self.lean = lean
+        self._idle = queue.Queue()
+        self._drivers = []
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _checkout(self):
+        while True:
+            try:
+                d = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        d = create_chrome_driver(self.headless, self.user_agent, lean=self.lean)
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        # 唤醒可能在等待的借用者，让它自己重试创建
+                        self._idle.put(None)
+                        raise
+                    with self._lock:
+                        self._drivers.append(d)
+                    return d
+                d = self._idle.get()
+            # None：有 driver 被丢弃、空出了名额，回到开头新建
+            if d is not None:
+                return d
+
+    def _discard(self, d):
+        with self._lock:
+            if d in self._drivers:
+                self._drivers.remove(d)
+                self._created -= 1
+        try:
+            d.quit()
+        except Exception:
+            pass
+        self._idle.put(None)
 
-def get_soup(url, headers):
-    r = requests.get(url, headers=headers, timeout=20)
-    r.raise_for_status()
-    return BeautifulSoup(r.text, "lxml"), r.text
+    @contextmanager
+    def driver(self):
+        d = self._checkout()
+        try:
+            yield d
+        except WebDriverException:
+            self._discard(d)
+            raise
+        except BaseException:
+            self._idle.put(d)
+            raise
+        else:
+            self._idle.put(d)
 
+    def close(self):
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for d in drivers:
+            try:
+                d.quit()
+            except Exception:
+                pass
 
-def _clean_text(s: str) -> str:
-    s = (s or "").strip()
-    s = re.sub(r"[ \t]+\n", "\n", s)
-    s = re.sub(r"\n{3,}", "\n\n", s)
-    return s.strip()
 
+# ===================== 搜索页数自动识别 / 分片拆分 =====================
 
-def extract_lead_description_text(soup, title: str) -> str:
-    """
-    ✅ 目标：抓 “Back/Download 之后、Statement by the Jury 之前”的那段项目介绍（Buzzard40 属于此结构）
-    """
-    container = soup.select_one("main") or soup.body or soup
-    text = container.get_text("\n", strip=True)
+SOLR_FILTER_PARAM = "solr%5Bfilter%5D%5B%5D="
+_SOLR_PAGE_RE = re.compile(r"solr(?:%5B|\[)page(?:%5D|\])=(\d+)", re.I)
+_RESULT_COUNT_RE = re.compile(
+    r"(\d{1,3}(?:[.,\u00a0 ]\d{3})+|\d+)\s*(?:results?|Ergebnisse|Treffer|hits|entries)\b", re.I
+)
 
-    # 可选：从标题后开始，避免顶部 banner/导航噪声
-    if title and title in text:
-        text = text.split(title, 1)[1]
 
-    # 从 “Back ... Download ...” 之后开始（有的页面这一行包含 Back 和 Download）
-    back_download_line = re.search(r"(?im)^\s*Back\b.*\bDownload\b.*$", text)
-    if back_download_line:
-        text = text[back_download_line.end():].strip()
+def _solr_filters(url: str) -> list:
+    return [v for k, v in parse_qsl(urlsplit(url).query) if k == "solr[filter][]"]
 
-    # 在以下分界点之前截断（优先 Jury marker，其次 Credits/推荐）
-    end_markers = [
+
+def _facet_name(filters) -> str:
+    return re.sub(r"[^\w.-]+", "_", ",".join(filters)).strip("_") or "all"
+
+
+def parse_max_pages(value: str):
+    """--max-pages：正整数，或 auto（返回 None）"""
+    if value == "auto":
+        return None
+    try:
+        pages = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a positive integer or 'auto', got {value!r}")
+    if pages < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1 (use 'auto' to detect), got {pages}")
+    return pages
+
+
+_PER_PAGE_PARAMS = ("solr[limit]", "solr[rows]", "limit", "rows", "per_page")
+
+
+def search_per_page(url: str):
+    """请求参数里显式指定的每页条数（solr[limit] / rows / per_page ...）；没有则返回 None"""
+    for k, v in parse_qsl(urlsplit(url).query):
+        if k in _PER_PAGE_PARAMS and v.isdigit() and int(v) > 0:
+            return int(v)
+    return None
+
+
+def search_result_count(html: str, page_url: str) -> int:
+    """
+    第 1 页结果列表里的项目数（URL 没指定每页条数时用来推断 per_page）
+    页面上还可能有推荐 / 导航里的 /project/ 链接：按 <a> 的 DOM 路径（去掉序号）分组，
+    只数链接最多的那一组（结果卡片同构，推荐区 / 导航位于别的容器下）
+    """
+    try:
+        doc = lxml.html.fromstring(html)
+    except Exception:
+        return 0
+    tree = doc.getroottree()
+    groups = defaultdict(set)
+    for a in doc.xpath(PROJECT_LINK_XPATH):
+        url = canonical_project_url(urljoin(page_url, (a.get("href") or "").strip()))
+        if url:
+            groups[re.sub(r"\[\d+\]", "", tree.getpath(a))].add(url)
+    return max((len(urls) for urls in groups.values()), default=0)
+
+
+def search_page_count(html: str, per_page: int):
+    """
+    从第 1 页 HTML 推算总页数 -> (pages, total)，取两者中较大的：
+    - 分页链接里最大的 solr[page]=N（分页栏常只显示当前页附近的窗口，可能偏小）
+    - “N results” 之类的结果数 ÷ 每页条数（向上取整）
+    都识别不到返回 (None, total)
+    """
+    html = (html or "").replace("&amp;", "&")
+    link_pages = max((int(n) for n in _SOLR_PAGE_RE.findall(html)), default=0)
+
+    total = None
+    m = _RESULT_COUNT_RE.search(html)
+    if m:
+        total = int(re.sub(r"\D", "", m.group(1)))
+
+    count_pages = -(-total // per_page) if total and per_page else 0
+    return (max(link_pages, count_pages) or None), total
+
+
+def _facet_child(value: str, parent: str) -> bool:
+    """value 是否恰好在 parent 下一层：meta_categories:/11/ ➜ /11/120/ 是，/11/120/121/ 不是"""
+    rest = value[len(parent):].strip("/") if value.startswith(parent) else ""
+    return bool(rest) and "/" not in rest
+
+
+def search_subfacets(html: str, search_url: str, field: str) -> list:
+    """
+    第 1 页侧栏里可用于拆分的子 facet（如分类）：filter 字段为 field、且当前 URL 还没用上的值
+    分层字段（meta_categories:/11/ ➜ /11/123/）只取当前值下面恰好一层（更深的值会与其父分片重叠）；
+    URL 里还没有这个字段时只取顶层值
+    """
+    current = _solr_filters(search_url)
+    parents = [v for v in current if v.split(":", 1)[0] == field]
+    found = []
+    try:
+        hrefs = lxml.html.fromstring(html).xpath("//a/@href")
+    except Exception:
+        return []
+    for href in hrefs:
+        for v in _solr_filters(urljoin(search_url, href)):
+            if v in current or v in found or v.split(":", 1)[0] != field:
+                continue
+            if not any(_facet_child(v, p) for p in parents or [field + ":"]):
+                continue
+            found.append(v)
+    return found
+
+
+def discover_search_pages(search_url, headers, pool=None, backend="auto", page_timeout=15, lean=False, split_field=None):
+    """
+    抓第 1 页（优先 HTTP，拿不到结果再用 Selenium），返回：
+    {"page_url", "urls", "pages", "total", "subfacets"}
+    """
+    page_url = f"{search_url}&solr%5Bpage%5D=1"
+    html, urls = "", []
+
+    if backend in ("http", "auto"):
+        try:
+            html = http_get(page_url, headers, 20).text
+            urls = _project_urls_from_html(html, page_url)
+        except requests.RequestException as e:
+            print(f"  ⚠️ HTTP 抓取第 1 页失败: {e}")
+
+    if not urls and backend != "http" and pool is not None:
+        with pool.driver() as driver:
+            try:
+                urls = fetch_search_page_selenium(driver, page_url, page_timeout, lean=lean)
+            except TimeoutError as e:
+                print(f"  ⚠️ Selenium 抓取第 1 页失败: {e}")
+            html = driver.page_source
+
+    # 每页条数优先取请求参数；URL 没指定时退回第 1 页结果列表的条数
+    # （多于一页时第 1 页必然是满的；只数结果列表，推荐 / 导航链接不会把每页条数推高、导致漏页）
+    per_page = search_per_page(page_url)
+    if per_page is None:
+        per_page = search_result_count(html, page_url) or len(urls)
+    pages, total = search_page_count(html, per_page)
+    if pages is None and urls:
+        pages = 1
+    if pages and pages > 1 and search_per_page(page_url) is None and not _SOLR_PAGE_RE.search(html.replace("&amp;", "&")):
+        print(f"  ⚠️ 第 1 页没有分页链接，页数按推断的每页 {per_page} 条估算；可在搜索 URL 里指定每页条数，或用 --max-pages N")
+    return {
+        "page_url": page_url,
+        "urls": urls,
+        "pages": pages,
+        "total": total,
+        "subfacets": search_subfacets(html, search_url, split_field) if split_field else [],
+    }
+
+
+# auto 模式：连续这么多页 HTTP 拿不到结果、Selenium 能拿到时，后续页不再先试 HTTP
+HTTP_FALLBACK_TRIP = 3
+
+
+def collect_project_links_with_cache(
+    search_url,
+    max_pages,
+    page_wait,
+    headless,
+    user_agent,
+    cache_path,
+    backend="auto",
+    browsers=1,
+    page_timeout=15,
+    lean=False,
+    known_urls=None,
+    stop_after=2,
+    cache_ttl=None,
+    fresh_pages=3,
+    pool=None,
+    stats_path=None,
+    split_pages=None,
+    split_field="meta_categories",
+    shard_workers=4
+):
+    """
+    backend:
+    - http：只用 requests + lxml 抓服务端渲染的搜索页（不启动 Chrome、不 sleep）
+    - selenium：原 Selenium 逻辑
+    - auto：先走 http；某页 http 拿不到 /project/ 链接时才回退 Selenium
+            每页单独判断；连续 HTTP_FALLBACK_TRIP 页都要回退（站点确实只在浏览器里渲染结果）时，
+            后续页才直接用 Selenium，避免每页白跑一次 http（偶发的 503 不会让整轮都走 Chrome）
+
+    browsers：并发抓取的页数 / Selenium driver 池大小（driver 只创建一次并复用）
+    缓存只在主线程合并写入
+
+    page_timeout：Selenium 等待结果列表就绪的上限（秒）；page_wait 为就绪后的额外固定等待
+    每页加载耗时写入同目录 search_page_stats.json
+
+    lean：Chrome 不加载图片/字体/媒体/第三方脚本，链接用一次 execute_script 批量取回
+
+    known_urls（incremental 模式）：已在 projects.json 里的项目 URL；
+        按页序处理，连续 stop_after 页没有新项目就停止翻页
+    cache_ttl（小时）：前 fresh_pages 页的缓存超过 TTL 会重抓；更深的页始终信任缓存
+        incremental 模式下不设 TTL 时，前 fresh_pages 页每次都重抓
+    pool：外部共享的 BrowserPool（多分片编排时传入，由调用方负责 close）
+
+    max_pages 为 None（--max-pages auto）：先抓第 1 页识别总页数（第 1 页结果直接写入缓存，不重复抓）；
+        页数超过 split_pages 且第 1 页侧栏有 split_field 子 facet 时，拆成子分片并发收集（子分片同样自动识别/拆分）
+    """
+    if backend not in SEARCH_BACKENDS:
+        raise ValueError(f"unknown search backend: {backend}")
+
+    cache = load_json(cache_path, [])
+    cache_map = {
+        item["Search Page URL"]: item
+        for item in cache
+        if isinstance(item, dict) and "Search Page URL" in item and "Project URLs" in item
+    }
+
+    all_project_urls = set()
+    headers = {"User-Agent": user_agent}
+
+    own_pool = pool is None
+    if own_pool:
+        pool = BrowserPool(browsers, headless, user_agent, lean=lean)
+    use_http = backend in ("http", "auto")
+
+    if stats_path is None:
+        stats_path = os.path.join(os.path.dirname(cache_path) or ".", "search_page_stats.json")
+
+    fetched_this_run = set()  # 自动识别时刚抓过的第 1 页：本轮无论 TTL / incremental 都直接用
+    if max_pages is None:
+        info = discover_search_pages(search_url, headers, pool, backend, page_timeout, lean, split_field)
+        max_pages = info["pages"] or 1
+        print(f"🔢 自动识别页数：{info['total'] or '?'} 个结果，共 {max_pages} 页 ➜ {search_url}")
+
+        if info["urls"]:
+            item = {"Search Page URL": info["page_url"], "Project URLs": info["urls"], "Fetched At": int(time.time())}
+            if info["page_url"] in cache_map:
+                cache[cache.index(cache_map[info["page_url"]])] = item
+            else:
+                cache.append(item)
+            cache_map[info["page_url"]] = item
+            fetched_this_run.add(info["page_url"])
+            save_json(cache_path, cache)
+
+        if split_pages and max_pages > split_pages and info["subfacets"]:
+            print(f"🪓 {max_pages} 页超过 {split_pages}，按 {split_field} 拆成 {len(info['subfacets'])} 个子分片")
+            current = _solr_filters(search_url)
+            shards = [
+                {
+                    "name": _facet_name(current + [v]),
+                    "search_url": search_url + "&" + SOLR_FILTER_PARAM + quote(v, safe=""),
+                    "max_pages": None,
+                }
+                for v in info["subfacets"]
+            ]
+            try:
+                links = collect_project_links_sharded(
+                    shards,
+                    os.path.splitext(cache_path)[0] + "_split",
+                    headless,
+                    user_agent,
+                    browsers=browsers,
+                    lean=lean,
+                    shard_workers=shard_workers,
+                    pool=pool,
+                    page_wait=page_wait,
+                    backend=backend,
+                    page_timeout=page_timeout,
+                    known_urls=known_urls,
+                    stop_after=stop_after,
+                    cache_ttl=cache_ttl,
+                    fresh_pages=fresh_pages,
+                    split_pages=split_pages,
+                    split_field=split_field
+                )
+            finally:
+                if own_pool:
+                    pool.close()
+            if info["total"] and len(links) < info["total"]:
+                print(f"⚠️ 子分片合计 {len(links)} 个项目，少于父分片的 {info['total']} 个（可能有项目不属于任何子分类）")
+            return links
+    load_stats = []
+    fallback_lock = threading.Lock()
+    fallback_streak = 0
+
+    def fetch_page(page, page_url):
+        nonlocal use_http, fallback_streak
+        print(f"📄 抓取搜索页 {page}: {page_url}")
+        urls = []
+        used = "http"
+        start = time.monotonic()
+        if use_http:
+            try:
+                urls = fetch_search_page_http(page_url, headers)
+            except requests.RequestException as e:
+                print(f"  ⚠️ HTTP 抓取失败: {e}")
+            if urls:
+                with fallback_lock:
+                    fallback_streak = 0
+
+        if not urls and backend != "http":
+            if use_http:
+                print(f"  ↪️ 搜索页 {page} HTTP 未发现项目链接，回退 Selenium")
+            used = "selenium"
+            start = time.monotonic()
+            with pool.driver() as driver:
+                urls = fetch_search_page_selenium(driver, page_url, page_timeout, page_wait, lean=lean)
+            if urls and backend == "auto" and use_http:
+                with fallback_lock:
+                    fallback_streak += 1
+                    if use_http and fallback_streak >= HTTP_FALLBACK_TRIP:
+                        use_http = False
+                        print(f"  🔌 连续 {fallback_streak} 页 HTTP 拿不到结果而 Selenium 可以，后续搜索页直接用 Selenium")
+
+        seconds = time.monotonic() - start
+        print(f"  ➜ 搜索页 {page} 发现 {len(urls)} 个项目（{used} {seconds:.2f}s）")
+        return urls, {"Page": page, "Seconds": round(seconds, 3), "Backend": used}
+
+    def cache_fresh(page, page_url) -> bool:
+        item = cache_map.get(page_url)
+        if item is None:
+            return False
+        if page_url in fetched_this_run:
+            return True
+        # 深页可信；前 fresh_pages 页超过 TTL 则重抓（旧缓存无 Fetched At 视为过期）
+        if page > fresh_pages:
+            return True
+        if cache_ttl is None:
+            # incremental 没给 TTL：前几页总是重抓，否则缓存里只有已知项目，提前停止会立刻触发
+            return known_urls is None
+        return (now - float(item.get("Fetched At") or 0)) < cache_ttl * 3600
+
+    now = time.time()
+    window = max(1, browsers) * 2 if known_urls is not None else max_pages
+    pages = iter(range(1, max_pages + 1))
+    pending = deque()  # (page, page_url, future | None, cached urls)
+    no_new_streak = 0
+    stopped = False
+
+    bar = tqdm(total=max_pages)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, browsers)) as ex:
+            while True:
+                # 按页序滑动窗口提交：incremental 模式下窗口有限，便于提前停止
+                while not stopped and sum(1 for x in pending if x[2] is not None) < window:
+                    page = next(pages, None)
+                    if page is None:
+                        break
+                    page_url = f"{search_url}&solr%5Bpage%5D={page}"
+                    if cache_fresh(page, page_url):
+                        pending.append((page, page_url, None, cache_map[page_url]["Project URLs"]))
+                    else:
+                        pending.append((page, page_url, ex.submit(fetch_page, page, page_url), None))
+
+                if not pending:
+                    break
+
+                page, page_url, fut, urls = pending.popleft()
+                bar.update(1)
+
+                if fut is None:
+                    # ✅ 命中缓存
+                    print(f"📦 使用缓存搜索页 {page}")
+                else:
+                    try:
+                        urls, stat = fut.result()
+                    except Exception as e:
+                        print(f"❌ 搜索页 {page} 失败: {e}")
+                        no_new_streak = 0
+                        continue
+
+                    load_stats.append(stat)
+
+                    if urls:
+                        item = {
+                            "Search Page URL": page_url,
+                            "Project URLs": urls,
+                            "Fetched At": int(time.time())
+                        }
+                        if page_url in cache_map:
+                            cache[cache.index(cache_map[page_url])] = item
+                        else:
+                            cache.append(item)
+                        cache_map[page_url] = item
+                        save_json(cache_path, cache)
+
+                all_project_urls.update(urls)
+
+                if known_urls is not None and not stopped:
+                    new = [u for u in urls if u not in known_urls]
+                    no_new_streak = 0 if new else no_new_streak + 1
+                    if no_new_streak >= stop_after:
+                        print(f"⏹️ 连续 {no_new_streak} 页没有新项目，停止翻页（第 {page} 页）")
+                        stopped = True
+                        for x in pending:
+                            if x[2] is not None:
+                                x[2].cancel()
+                        pending.clear()
+    finally:
+        bar.close()
+        if own_pool:
+            pool.close()
+
+    if load_stats:
+        summary = summarize_load_times(load_stats)
+        print(
+            f"⏱️ 搜索页加载耗时：{summary['count']} 页，"
+            f"avg {summary['avg']}s / p95 {summary['p95']}s / max {summary['max']}s"
+        )
+        save_json(stats_path, {
+            "summary": summary,
+            "pages": sorted(load_stats, key=lambda x: x["Page"])
+        })
+
+    return sorted(all_project_urls)
+
+
+# ===================== 多分片（facet）并发收集 =====================
+
+def parse_facet(spec: str, search_url: str, max_pages: int) -> dict:
+    """
+    --facet 规格 -> 分片：
+    "year:2024"                    ➜ search_url + &solr[filter][]=year:2024
+    "year:2024,meta_categories:/11/@188" ➜ 多个 filter，@N 指定该分片的页数（默认 --max-pages）
+    """
+    filters, _, pages = spec.partition("@")
+    if pages:
+        try:
+            max_pages = parse_max_pages(pages)
+        except argparse.ArgumentTypeError as e:
+            raise SystemExit(f"❌ --facet {spec!r}: {e}")
+    url = search_url
+    for f in filters.split(","):
+        f = f.strip()
+        if f:
+            url += ("&" if "?" in url else "?") + SOLR_FILTER_PARAM + quote(f, safe="")
+    return {
+        "name": _facet_name([filters]),
+        "search_url": url,
+        "max_pages": max_pages,
+    }
+
+
+def collect_project_links_sharded(
+    shards,
+    cache_dir,
+    headless,
+    user_agent,
+    browsers=1,
+    lean=False,
+    shard_workers=4,
+    pool=None,
+    **collector_kwargs
+):
+    """
+    同一进程内并发收集多个搜索分片（年份 / 分类 facet），替代逐个 subprocess 跑 main.py：
+    - 所有分片共享一个 BrowserPool（Chrome 总数仍是 browsers）、全局限速器和 HTTP 连接池
+    - 每个分片独立的搜索页缓存：<cache_dir>/<name>.json（统计：<name>.stats.json）
+    - 返回跨分片去重后的项目 URL，详情页只抓一次
+    - max_pages 为 None 的分片自动识别页数（见 collect_project_links_with_cache）
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    own_pool = pool is None
+    if own_pool:
+        pool = BrowserPool(browsers, headless, user_agent, lean=lean)
+
+    def run(shard):
+        print(f"🧩 分片 {shard['name']}：{shard['max_pages'] or '自动识别'} 页")
+        return collect_project_links_with_cache(
+            shard["search_url"],
+            shard["max_pages"],
+            headless=headless,
+            user_agent=user_agent,
+            cache_path=os.path.join(cache_dir, f"{shard['name']}.json"),
+            stats_path=os.path.join(cache_dir, f"{shard['name']}.stats.json"),
+            browsers=browsers,
+            lean=lean,
+            pool=pool,
+            shard_workers=shard_workers,
+            **collector_kwargs
+        )
+
+    per_shard = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, shard_workers)) as ex:
+            futures = {ex.submit(run, shard): shard["name"] for shard in shards}
+            for fut in as_completed(futures):
+                name = futures[fut]
+                try:
+                    per_shard[name] = fut.result()
+                except Exception as e:
+                    print(f"❌ 分片 {name} 失败: {e}")
+                    per_shard[name] = []
+    finally:
+        if own_pool:
+            pool.close()
+
+    links = set()
+    for urls in per_shard.values():
+        links.update(urls)
+    total = sum(len(urls) for urls in per_shard.values())
+    for shard in shards:
+        print(f"  ➜ 分片 {shard['name']}：{len(per_shard.get(shard['name'], []))} 个项目")
+    print(f"🧩 {len(shards)} 个分片共 {total} 个链接，跨分片去重后 {len(links)} 个")
+    return sorted(links)
+
+
+# ===================== 详情解析 =====================
+
+class HtmlCache:
+    """
+    详情页原始 HTML 磁盘缓存（按 URL 的 sha1 分桶）：
+    - <root>/<ab>/<sha1>.html.gz：gzip 压缩的页面正文
+    - <root>/<ab>/<sha1>.json：{"Project URL", "ETag", "Last-Modified", "Fetched At"}
+    重抓时带 If-None-Match / If-Modified-Since，304 直接复用本地正文
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        folder = os.path.join(self.root, key[:2])
+        return os.path.join(folder, f"{key}.html.gz"), os.path.join(folder, f"{key}.json")
+
+    def meta(self, url) -> dict:
+        body_path, meta_path = self._paths(url)
+        if not (os.path.exists(body_path) and os.path.exists(meta_path)):
+            return {}
+        try:
+            return load_json(meta_path, {})
+        except (OSError, ValueError):
+            return {}
+
+    def conditional_headers(self, url) -> dict:
+        meta = self.meta(url)
+        h = {}
+        if meta.get("ETag"):
+            h["If-None-Match"] = meta["ETag"]
+        if meta.get("Last-Modified"):
+            h["If-Modified-Since"] = meta["Last-Modified"]
+        return h
+
+    def load(self, url) -> str:
+        body_path, _ = self._paths(url)
+        with gzip.open(body_path, "rb") as f:
+            return f.read().decode("utf-8")
+
+    def store(self, url, text, resp_headers):
+        body_path, meta_path = self._paths(url)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+
+        tmp_path = body_path + f".{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+            f.write(text.encode("utf-8"))
+        os.replace(tmp_path, body_path)
+
+        save_json(meta_path, {
+            "Project URL": url,
+            "ETag": resp_headers.get("ETag", ""),
+            "Last-Modified": resp_headers.get("Last-Modified", ""),
+            "Fetched At": int(time.time()),
+        })
+
+    def iter_urls(self):
+        """遍历已归档的 (url, body 路径)"""
+        for folder, _, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                meta = load_json(os.path.join(folder, name), {})
+                body_path = os.path.join(folder, name[:-len(".json")] + ".html.gz")
+                if meta.get("Project URL") and os.path.exists(body_path):
+                    yield meta["Project URL"], body_path
+
+
+def fetch_project_html(url, headers, html_cache=None, conditional=True):
+    """
+    返回 (raw_text, changed)
+    - 无缓存：普通 GET，changed=True
+    - 有缓存：条件 GET；304 -> (本地正文, False)，200 -> 写缓存后 (新正文, True)
+    - conditional=False：不带 If-None-Match / If-Modified-Since（该 URL 还没有保存成功的记录，
+      缓存里的正文可能来自一次图片下载失败 / 不合规的抓取，304 会让它永远被跳过）
+    """
+    if html_cache is None:
+        return http_get(url, headers, 20).text, True
+
+    cond = html_cache.conditional_headers(url) if conditional else {}
+    r = http_get(url, dict(headers, **cond), 20)
+    if r.status_code == 304 and cond:
+        return html_cache.load(url), False
+
+    html_cache.store(url, r.text, r.headers)
+    return r.text, True
+
+
+# 解析用正则：模块级预编译，避免每个 URL / 每次循环重复 compile
+_WS_BEFORE_NL_RE = re.compile(r"[ \t]+\n")
+_MULTI_NL_RE = re.compile(r"\n{3,}")
+_BACK_DOWNLOAD_RE = re.compile(r"(?im)^\s*Back\b.*\bDownload\b.*$")
+_LEAD_END_RES = [
+    re.compile(pat, re.I)
+    for pat in (
         r"Statement by the Jury",
         r"Jury statement",
         r"Begründung der Jury",
@@ -259,9 +1696,39 @@ def extract_lead_description_text(soup, title: str) -> str:
         r"Credits",
         r"Others interested too",
         r"Andere interessierten sich auch",
-    ]
-    for pat in end_markers:
-        m = re.search(pat, text, flags=re.I)
+    )
+]
+_JURY_RE = re.compile(r"(Statement by the Jury|Jury statement|Begründung der Jury)", re.I)
+_PIM_YEAR_RE = re.compile(r"/projects_pim/(19\d{2}|20[0-3]\d)/", re.I)
+_FILE_YEAR_RE = re.compile(r"\b(19\d{2}|20[0-3]\d)\s*(PD|BCD|DC)\b", re.I)
+_YEAR_NOISE_RE = re.compile(r"TYPO3|copyright|meta\s+name|\bgenerator\b|revisit-after", re.I)
+_HEAD_RE = re.compile(r"<head\b.*?</head>", re.I | re.S)
+_BOUNDARY_RE = re.compile(r"Others interested too", re.I)
+IMG_EXT_RE = re.compile(r"\.(jpe?g|png|webp|gif|bmp|tiff|svg)(\?.*)?$", re.I)
+
+_META_IMAGE_KEYS = (("property", "og:image"), ("property", "og:image:url"), ("name", "twitter:image"))
+
+
+def _clean_text(s: str) -> str:
+    s = (s or "").strip()
+    s = _WS_BEFORE_NL_RE.sub("\n", s)
+    s = _MULTI_NL_RE.sub("\n\n", s)
+    return s.strip()
+
+
+def _lead_description_from_text(text: str, title: str) -> str:
+    # 可选：从标题后开始，避免顶部 banner/导航噪声
+    if title and title in text:
+        text = text.split(title, 1)[1]
+
+    # 从 “Back ... Download ...” 之后开始（有的页面这一行包含 Back 和 Download）
+    back_download_line = _BACK_DOWNLOAD_RE.search(text)
+    if back_download_line:
+        text = text[back_download_line.end():].strip()
+
+    # 在以下分界点之前截断（优先 Jury marker，其次 Credits/推荐）
+    for pat in _LEAD_END_RES:
+        m = pat.search(text)
         if m:
             text = text[:m.start()].strip()
             break
@@ -285,7 +1752,7 @@ def extract_lead_description_text(soup, title: str) -> str:
     return desc
 
 
-def extract_year_from_reddot(soup, raw_text: str, base_url: str) -> str:
+def _year_from_signals(url_values: list, visible_text: str, raw_text: str, base_url: str) -> str:
     """
     Red Dot 项目页年份提取（更鲁棒）：
     1) 优先从项目相关图片/链接URL中找：
@@ -300,35 +1767,6 @@ def extract_year_from_reddot(soup, raw_text: str, base_url: str) -> str:
         if y:
             cand.extend([y] * w)
 
-    # -------------- 1) 强信号：从页面中所有可能的 url / srcset 抽取 --------------
-    # 注意：不依赖你后面 images 是否收集成功；这里单独扫描一遍更稳
-    url_values = []
-
-    # meta image 也可能带 projects_pim
-    for m in soup.select('meta[property="og:image"], meta[property="og:image:url"], meta[name="twitter:image"]'):
-        c = (m.get("content") or "").strip()
-        if c:
-            url_values.append(c)
-
-    # 扫 main（避免 footer/head 噪声），但仍能拿到主图/slider 的 src/srcset/href
-    container = soup.select_one("main") or soup.body or soup
-    for el in container.descendants:
-        if not isinstance(el, Tag):
-            continue
-        if el.name == "img":
-            for k in ("src", "data-src", "data-original", "srcset"):
-                v = el.get(k)
-                if v:
-                    url_values.append(v)
-        elif el.name == "source":
-            v = el.get("srcset") or el.get("data-src")
-            if v:
-                url_values.append(v)
-        elif el.name == "a":
-            v = el.get("href")
-            if v:
-                url_values.append(v)
-
     # 展开 srcset： "url 575w, url 1150w" -> [url, url]
     expanded = []
     for v in url_values:
@@ -349,12 +1787,12 @@ def extract_year_from_reddot(soup, raw_text: str, base_url: str) -> str:
         u_abs = urljoin(base_url, u)
 
         # /projects_pim/<year>/
-        m = re.search(r"/projects_pim/(19\d{2}|20[0-3]\d)/", u_abs, re.I)
+        m = _PIM_YEAR_RE.search(u_abs)
         if m:
             add(m.group(1), w=10)
 
         # 文件名里：2025PD / 2025BCD / 2025DC
-        m = re.search(r"\b(19\d{2}|20[0-3]\d)\s*(PD|BCD|DC)\b", u_abs, re.I)
+        m = _FILE_YEAR_RE.search(u_abs)
         if m:
             add(m.group(1), w=9)
 
@@ -362,28 +1800,15 @@ def extract_year_from_reddot(soup, raw_text: str, base_url: str) -> str:
         return Counter(cand).most_common(1)[0][0]
 
     # -------------- 2) 次强信号：main 可见文本，过滤噪声行 --------------
-    visible_text = (container.get_text("\n", strip=True) if container else "")
     if visible_text:
-        noise = [
-            r"TYPO3",
-            r"copyright",
-            r"meta\s+name",
-            r"\bgenerator\b",
-            r"revisit-after",
-        ]
-        lines = []
-        for line in visible_text.splitlines():
-            if any(re.search(p, line, re.I) for p in noise):
-                continue
-            lines.append(line)
-        vt = "\n".join(lines)
+        vt = "\n".join(line for line in visible_text.splitlines() if not _YEAR_NOISE_RE.search(line))
         years = YEAR_RE.findall(vt)
         if years:
             return Counter(years).most_common(1)[0][0]
 
     # -------------- 3) 兜底：raw_text 但先去掉 head，避免 meta date 抢占 --------------
     if raw_text:
-        cleaned = re.sub(r"<head\b.*?</head>", "", raw_text, flags=re.I | re.S)
+        cleaned = _HEAD_RE.sub("", raw_text)
         m = YEAR_RE.search(cleaned)
         if m:
             return m.group(1)
@@ -391,148 +1816,287 @@ def extract_year_from_reddot(soup, raw_text: str, base_url: str) -> str:
     return ""
 
 
-def extract_project_data(url, headers, base_url):
-    soup, raw_text = get_soup(url, headers)
+def _year_url_values(el, name: str, out: list):
+    """从 img/source/a 上收集可能带年份的 URL（与图片收集规则分开：不受推荐区边界限制）"""
+    if name == "img":
+        for k in ("src", "data-src", "data-original", "srcset"):
+            v = el.get(k)
+            if v:
+                out.append(v)
+    elif name == "source":
+        v = el.get("srcset") or el.get("data-src")
+        if v:
+            out.append(v)
+    elif name == "a":
+        v = el.get("href")
+        if v:
+            out.append(v)
+
+
+def _is_meta_image(el) -> bool:
+    return el.name == "meta" and any(el.get(k) == v for k, v in _META_IMAGE_KEYS)
+
+
+def _pick_from_srcset(srcset: str) -> str:
+    """
+    srcset 里通常是 'url 320w, url 640w ...' 或 'url 1x, url 2x'
+    这里简单取最后一个（通常最大/最清晰）
+    """
+    if not srcset:
+        return ""
+    parts = [p.strip() for p in srcset.split(",") if p.strip()]
+    if not parts:
+        return ""
+    return parts[-1].split()[0].strip()
+
+
+def _image_candidates(el, name: str) -> list:
+    """main 容器里单个元素贡献的图片候选（img/a/source，含 lazyload & srcset）"""
+    if name == "img":
+        src = el.get("src") or el.get("data-src") or el.get("data-original") or ""
+        return [src, _pick_from_srcset(el.get("srcset") or "")]
+    if name == "source":
+        return [_pick_from_srcset(el.get("srcset") or "")]
+    if name == "a":
+        return [el.get("href") or ""]
+    return []
+
+
+def _collect_images_from_obj(obj):
+    found = []
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            if k.lower() == "image":
+                if isinstance(v, str):
+                    found.append(v)
+                elif isinstance(v, list):
+                    for it in v:
+                        if isinstance(it, str):
+                            found.append(it)
+                        elif isinstance(it, dict) and isinstance(it.get("url"), str):
+                            found.append(it["url"])
+                elif isinstance(v, dict) and isinstance(v.get("url"), str):
+                    found.append(v["url"])
+            else:
+                found.extend(_collect_images_from_obj(v))
+    elif isinstance(obj, list):
+        for it in obj:
+            found.extend(_collect_images_from_obj(it))
+    return found
+
+
+def _normalize_image_url(u: str, base_url: str) -> str:
+    """返回绝对 URL；不像项目图片时返回空串"""
+    if not u:
+        return ""
+    u = u.strip().split("#")[0]
+
+    # 处理 //xxx
+    if u.startswith("//"):
+        u = "https:" + u
+
+    # 统一成绝对 URL
+    u_abs = urljoin(base_url, u)
+
+    # ✅ 兼容旧逻辑：slider / projects_pim
+    ok_old = ("projects_pim" in u_abs) or ("eID=tx_solr_image" in u_abs and "usage=slider" in u_abs)
+
+    # ✅ 新增：Red Dot 很多项目主图在 fileadmin/user_upload/projects
+    ok_fileadmin = ("/fileadmin/user_upload/projects/" in u_abs) or ("/fileadmin/user_upload/" in u_abs)
+
+    # ✅ 兜底：看起来是图片扩展名也收（但仍受 boundary/main 容器限制）
+    ok_ext = bool(IMG_EXT_RE.search(u_abs))
+
+    return u_abs if (ok_old or ok_fileadmin or ok_ext) else ""
+
+
+class _PageScan:
+    """
+    单次遍历整棵 DOM 收集 parse_project_page 需要的所有信号：
+    - 文档级：第一个 h1 / .breadcrumb / .project-description、meta 图片与描述、JSON-LD、
+      第一个 “Others interested too” 文本（推荐区边界）
+    - main 容器内：年份 URL 信号、图片候选（遇到边界停止）、可见文本（等价于 get_text("\n", strip=True)）
+    """
+
+    def __init__(self, soup):
+        self.container = soup.select_one("main") or soup.body or soup
+        self.string_types = self.container.interesting_string_types
+
+        self.h1 = None
+        self.breadcrumb = None
+        self.project_description = None
+        self.meta_description = None
+        self.og_description = None
+        self.meta_images = []
+        self.ld_json = []
+
+        self.year_urls = []
+        self.image_candidates = []
+        self.text_parts = []
+
+        self._boundary_seen = False
+        self._images_done = False
+        self._image_marks = {}
+
+        if self.container is soup:
+            for el in soup.descendants:
+                self._visit(el, inside=True)
+            return
+
+        node = soup.contents[0] if soup.contents else None
+        while node is not None:
+            if node is self.container:
+                self._visit(node, inside=False)
+                last = node
+                for el in node.descendants:
+                    self._visit(el, inside=True)
+                    last = el
+                node = last.next_element
+                continue
+            self._visit(node, inside=False)
+            node = node.next_element
+
+    @property
+    def visible_text(self) -> str:
+        return "\n".join(self.text_parts)
+
+    # ---- 与 _LxmlPageScan 一致的取值接口 ----
+    def title(self) -> str:
+        return self.h1.get_text(strip=True) if self.h1 is not None else "Unknown"
+
+    def category(self) -> str:
+        return self.breadcrumb.get_text(" / ", strip=True) if self.breadcrumb is not None else ""
+
+    def project_description_text(self):
+        if self.project_description is None:
+            return None
+        return self.project_description.get_text("\n", strip=True)
+
+    def meta_description_content(self):
+        return self.meta_description.get("content") if self.meta_description is not None else None
+
+    def og_description_content(self):
+        return self.og_description.get("content") if self.og_description is not None else None
 
-    title_tag = soup.select_one("h1")
-    title = title_tag.get_text(strip=True) if title_tag else "Unknown"
+    def ld_json_texts(self) -> list:
+        return [s.string or "" for s in self.ld_json]
 
-    category = ""
-    cat = soup.select_one(".breadcrumb")
-    if cat:
-        category = cat.get_text(" / ", strip=True)
+    def _visit(self, el, inside: bool):
+        if isinstance(el, Tag):
+            self._visit_tag(el, inside)
+            return
+
+        if not isinstance(el, NavigableString):
+            return
+
+        if not self._boundary_seen and _BOUNDARY_RE.search(el):
+            self._boundary_seen = True
+            parent = el.parent
+            # 边界标签在 main 内（且不是 main 本身）时：丢弃它及之后的图片候选
+            if inside and parent is not None and id(parent) in self._image_marks:
+                del self.image_candidates[self._image_marks[id(parent)]:]
+                self._images_done = True
+
+        if inside and type(el) in self.string_types:
+            t = el.strip()
+            if t:
+                self.text_parts.append(t)
+
+    def _visit_tag(self, el, inside: bool):
+        name = el.name
+        if self.h1 is None and name == "h1":
+            self.h1 = el
+        if self.breadcrumb is None and "breadcrumb" in (el.get("class") or ()):
+            self.breadcrumb = el
+        if self.project_description is None and "project-description" in (el.get("class") or ()):
+            self.project_description = el
+
+        if name == "meta":
+            if _is_meta_image(el):
+                self.meta_images.append(el.get("content") or "")
+            if self.meta_description is None and el.get("name") == "description":
+                self.meta_description = el
+            if self.og_description is None and el.get("property") == "og:description":
+                self.og_description = el
+        elif name == "script" and el.get("type") == "application/ld+json":
+            self.ld_json.append(el)
+
+        if not inside:
+            return
+
+        _year_url_values(el, name, self.year_urls)
+        if not self._images_done:
+            self._image_marks[id(el)] = len(self.image_candidates)
+            self.image_candidates.extend(_image_candidates(el, name))
+
+
+def extract_project_data(url, headers, base_url, html_cache=None, parser="bs4", conditional=True):
+    """
+    html_cache 为 None 时与原逻辑一致；
+    传入 HtmlCache 时走条件 GET，页面未变化（304）返回 None，跳过解析
+    conditional=False：该 URL 没有已保存的记录，不发条件请求（见 fetch_project_html）
+    parser：解析后端（见 PARSER_BACKENDS）
+    """
+    raw_text, changed = fetch_project_html(url, headers, html_cache, conditional)
+    if not changed:
+        return None
+    return parse_project_html(raw_text, url, base_url, parser)
+
+
+def parse_project_page(soup, raw_text, url, base_url):
+    """单次 DOM 遍历（_PageScan）抽取 Title / Year / Category / Description / Images"""
+    return _project_from_scan(_PageScan(soup), raw_text, url, base_url)
+
+
+def _project_from_scan(scan, raw_text, url, base_url):
+    """scan 为 _PageScan（bs4）或 _LxmlPageScan（lxml），两个后端共用这里的规则"""
+    title = scan.title()
+    category = scan.category()
+
+    visible_text = scan.visible_text
 
-    # ✅ 替换这里：用更稳的年份抽取（其余逻辑不变）
-    year = extract_year_from_reddot(soup, raw_text, base_url)
+    # ✅ 年份：meta 图片 + main 内 URL 信号 -> main 可见文本 -> raw_text
+    year_urls = [c.strip() for c in scan.meta_images if c.strip()] + scan.year_urls
+    year = _year_from_signals(year_urls, visible_text, raw_text, base_url)
 
     # ✅ 先用“Back/Download ~ Jury”规则抽取 lead description
-    desc = extract_lead_description_text(soup, title)
+    desc = _lead_description_from_text(visible_text, title)
 
     # ----------------- 兜底：如果 lead 抽不到，再尝试其他方式 -----------------
     if not desc:
-        block = soup.select_one(".project-description")
-        if block:
-            tmp = _clean_text(block.get_text("\n", strip=True))
+        block_text = scan.project_description_text()
+        if block_text is not None:
+            tmp = _clean_text(block_text)
             # 避免把 jury statement 当作 description（如果里面出现 Jury marker，放弃）
-            if not re.search(r"(Statement by the Jury|Jury statement|Begründung der Jury)", tmp, re.I):
+            if not _JURY_RE.search(tmp):
                 desc = tmp
 
     if not desc:
         # 最后兜底：meta description / og:description
-        meta = soup.find("meta", attrs={"name": "description"})
-        if meta and meta.get("content"):
-            desc = _clean_text(meta["content"])
+        content = scan.meta_description_content()
+        if content:
+            desc = _clean_text(content)
     if not desc:
-        og = soup.find("meta", attrs={"property": "og:description"})
-        if og and og.get("content"):
-            desc = _clean_text(og["content"])
+        content = scan.og_description_content()
+        if content:
+            desc = _clean_text(content)
     # ------------------------------------------------------------------------
 
     # ----------------- ✅ Images (兼容旧规则 + 支持 fileadmin/srcset/meta/jsonld；仍排除推荐区) -----------------
-    images = []
+    raw_images = list(scan.meta_images)
 
-    IMG_EXT_RE = re.compile(r"\.(jpe?g|png|webp|gif|bmp|tiff|svg)(\?.*)?$", re.I)
-
-    def _pick_from_srcset(srcset: str) -> str:
-        """
-        srcset 里通常是 'url 320w, url 640w ...' 或 'url 1x, url 2x'
-        这里简单取最后一个（通常最大/最清晰）
-        """
-        if not srcset:
-            return ""
-        parts = [p.strip() for p in srcset.split(",") if p.strip()]
-        if not parts:
-            return ""
-        return parts[-1].split()[0].strip()
-
-    def add_img(u: str):
-        if not u:
-            return
-        u = u.strip().split("#")[0]
-
-        # 处理 //xxx
-        if u.startswith("//"):
-            u = "https:" + u
-
-        # 统一成绝对 URL
-        u_abs = urljoin(base_url, u)
-
-        # ✅ 兼容旧逻辑：slider / projects_pim
-        ok_old = ("projects_pim" in u_abs) or ("eID=tx_solr_image" in u_abs and "usage=slider" in u_abs)
-
-        # ✅ 新增：Red Dot 很多项目主图在 fileadmin/user_upload/projects
-        ok_fileadmin = ("/fileadmin/user_upload/projects/" in u_abs) or ("/fileadmin/user_upload/" in u_abs)
-
-        # ✅ 兜底：看起来是图片扩展名也收（但仍受 boundary/main 容器限制）
-        ok_ext = bool(IMG_EXT_RE.search(u_abs))
-
-        if ok_old or ok_fileadmin or ok_ext:
-            images.append(u_abs)
-
-    # 边界：到 “Others interested too” 就停止
-    boundary_tag = None
-    boundary_text = soup.find(string=re.compile(r"Others interested too", re.I))
-    if boundary_text:
-        boundary_tag = boundary_text.find_parent()
-
-    container = soup.select_one("main") or soup.body or soup
-
-    # 1) meta 主图（常见）
-    for m in soup.select('meta[property="og:image"], meta[property="og:image:url"], meta[name="twitter:image"]'):
-        add_img(m.get("content") or "")
-
-    # 2) JSON-LD image 字段（兜底）
-    def _collect_images_from_obj(obj):
-        found = []
-        if isinstance(obj, dict):
-            for k, v in obj.items():
-                if k.lower() == "image":
-                    if isinstance(v, str):
-                        found.append(v)
-                    elif isinstance(v, list):
-                        for it in v:
-                            if isinstance(it, str):
-                                found.append(it)
-                            elif isinstance(it, dict) and isinstance(it.get("url"), str):
-                                found.append(it["url"])
-                    elif isinstance(v, dict) and isinstance(v.get("url"), str):
-                        found.append(v["url"])
-                else:
-                    found.extend(_collect_images_from_obj(v))
-        elif isinstance(obj, list):
-            for it in obj:
-                found.extend(_collect_images_from_obj(it))
-        return found
-
-    for s in soup.find_all("script", attrs={"type": "application/ld+json"}):
-        txt = (s.string or "").strip()
+    for txt in scan.ld_json_texts():
+        txt = (txt or "").strip()
         if not txt:
             continue
         try:
-            data = json.loads(txt)
-            for u in _collect_images_from_obj(data):
-                add_img(u)
+            raw_images.extend(_collect_images_from_obj(json.loads(txt)))
         except Exception:
             pass
 
-    # 3) main 容器扫描：img/a/source（含 lazyload & srcset）
-    for el in container.descendants:
-        if boundary_tag is not None and isinstance(el, Tag) and el is boundary_tag:
-            break
-        if not isinstance(el, Tag):
-            continue
-
-        if el.name == "img":
-            src = el.get("src") or el.get("data-src") or el.get("data-original") or ""
-            add_img(src)
-            add_img(_pick_from_srcset(el.get("srcset") or ""))
-
-        elif el.name == "source":
-            add_img(_pick_from_srcset(el.get("srcset") or ""))
+    raw_images.extend(scan.image_candidates)
 
-        elif el.name == "a":
-            href = el.get("href") or ""
-            add_img(href)
+    images = [u for u in (_normalize_image_url(x, base_url) for x in raw_images) if u]
 
     # 去重（保序）
     images = list(dict.fromkeys(images))
@@ -548,6 +2112,302 @@ def extract_project_data(url, headers, base_url):
     }
 
 
+# ===================== lxml 解析后端（不构建 BeautifulSoup 对象树） =====================
+
+# bs4 把这些标签里的文字当作 Script/Stylesheet/TemplateString/Ruby*，get_text 默认不包含
+_LXML_SKIP_TEXT_TAGS = frozenset(["script", "style", "template", "rt", "rp"])
+
+
+def _lxml_events(root, container=None):
+    """
+    按文档顺序产出与 bs4 descendants 等价的事件（root 自身的 tail 不算子树）：
+    - ("tag", el, inside)
+    - ("str", text, parent, visible, inside)
+    visible=False：注释 / script 等 bs4 get_text 默认不收的字符串
+    inside：是否位于 container 的子树内（container 本身不算）
+    """
+    stack = [(root, False, False, False)]
+    while stack:
+        el, is_tail, hidden, inside = stack.pop()
+        if is_tail:
+            if el.tail:
+                yield ("str", el.tail, el.getparent(), not hidden, inside)
+            continue
+
+        if not isinstance(el.tag, str):
+            # 注释 / PI：自身内容不可见，tail 属于父元素
+            if el.text:
+                yield ("str", el.text, el.getparent(), False, inside)
+            if el is not root:
+                stack.append((el, True, hidden, inside))
+            continue
+
+        yield ("tag", el, inside)
+        inner_hidden = hidden or el.tag in _LXML_SKIP_TEXT_TAGS
+        inner_inside = inside or el is container
+
+        if el is not root:
+            stack.append((el, True, hidden, inside))
+        if el.text:
+            yield ("str", el.text, el, not inner_hidden, inner_inside)
+        for child in reversed(el):
+            stack.append((child, False, inner_hidden, inner_inside))
+
+
+def _lxml_text(el, sep: str) -> str:
+    parts = []
+    for ev in _lxml_events(el):
+        if ev[0] == "str" and ev[3]:
+            t = ev[1].strip()
+            if t:
+                parts.append(t)
+    return sep.join(parts)
+
+
+def _lxml_classes(el) -> list:
+    return (el.get("class") or "").split()
+
+
+class _LxmlPageScan:
+    """_PageScan 的 lxml.html 版本：同样一次遍历，输出接口保持一致"""
+
+    def __init__(self, raw_text: str):
+        try:
+            root = lxml.html.document_fromstring(raw_text)
+        except ValueError:
+            # 带 <?xml encoding=...?> 声明的 str 不能直接解析
+            root = lxml.html.document_fromstring(raw_text.encode("utf-8"))
+
+        main = next(root.iter("main"), None)
+        body = next(root.iter("body"), None)
+        self.container = main if main is not None else (body if body is not None else root)
+
+        self.h1 = None
+        self.breadcrumb = None
+        self.project_description = None
+        self.meta_description = None
+        self.og_description = None
+        self.meta_images = []
+        self.ld_json = []
+
+        self.year_urls = []
+        self.image_candidates = []
+        self.text_parts = []
+
+        self._boundary_seen = False
+        self._images_done = False
+        # 以元素本身为 key（持有引用，保证 lxml 代理对象身份稳定）
+        self._image_marks = {}
+
+        for ev in _lxml_events(root, self.container):
+            if ev[0] == "tag":
+                self._visit_tag(ev[1], inside=ev[2])
+            else:
+                self._visit_str(ev[1], ev[2], ev[3], ev[4])
+
+    @property
+    def visible_text(self) -> str:
+        return "\n".join(self.text_parts)
+
+    def title(self) -> str:
+        return _lxml_text(self.h1, "") if self.h1 is not None else "Unknown"
+
+    def category(self) -> str:
+        return _lxml_text(self.breadcrumb, " / ") if self.breadcrumb is not None else ""
+
+    def project_description_text(self):
+        if self.project_description is None:
+            return None
+        return _lxml_text(self.project_description, "\n")
+
+    def meta_description_content(self):
+        return self.meta_description.get("content") if self.meta_description is not None else None
+
+    def og_description_content(self):
+        return self.og_description.get("content") if self.og_description is not None else None
+
+    def ld_json_texts(self) -> list:
+        return [el.text or "" for el in self.ld_json]
+
+    def _visit_str(self, text, parent, visible, inside):
+        if not self._boundary_seen and _BOUNDARY_RE.search(text):
+            self._boundary_seen = True
+            if inside and parent is not None and parent in self._image_marks:
+                del self.image_candidates[self._image_marks[parent]:]
+                self._images_done = True
+
+        if inside and visible:
+            t = text.strip()
+            if t:
+                self.text_parts.append(t)
+
+    def _visit_tag(self, el, inside: bool):
+        name = el.tag
+        classes = _lxml_classes(el)
+        if self.h1 is None and name == "h1":
+            self.h1 = el
+        if self.breadcrumb is None and "breadcrumb" in classes:
+            self.breadcrumb = el
+        if self.project_description is None and "project-description" in classes:
+            self.project_description = el
+
+        if name == "meta":
+            if any(el.get(k) == v for k, v in _META_IMAGE_KEYS):
+                self.meta_images.append(el.get("content") or "")
+            if self.meta_description is None and el.get("name") == "description":
+                self.meta_description = el
+            if self.og_description is None and el.get("property") == "og:description":
+                self.og_description = el
+        elif name == "script" and el.get("type") == "application/ld+json":
+            self.ld_json.append(el)
+
+        if not inside:
+            return
+
+        _year_url_values(el, name, self.year_urls)
+        if not self._images_done:
+            self._image_marks[el] = len(self.image_candidates)
+            self.image_candidates.extend(_image_candidates(el, name))
+
+
+def parse_project_page_lxml(raw_text, url, base_url):
+    return _project_from_scan(_LxmlPageScan(raw_text), raw_text, url, base_url)
+
+
+def parse_project_page_bs4(raw_text, url, base_url):
+    return parse_project_page(BeautifulSoup(raw_text, "lxml"), raw_text, url, base_url)
+
+
+PARSER_BACKENDS = {
+    "bs4": parse_project_page_bs4,
+    "lxml": parse_project_page_lxml,
+}
+
+
+def parse_project_html(raw_text, url, base_url, parser="bs4"):
+    """
+    按 --parser 选择解析后端；两个后端输出的 dict 应完全一致（见 scripts/parser_parity.py）
+    解析后再做一次图片 URL 归一（同一张图的多个尺寸 / 代理地址只留一个）
+    """
+    data = PARSER_BACKENDS[parser](raw_text, url, base_url)
+    data["Images"], data["Dropped Images"] = canonicalize_images(data["Images"])
+    return data
+
+
+# ===================== 图片 URL 归一（同一素材只保留一个 rendition） =====================
+
+# 文件名尾部的尺寸标记：-575w / _1150px / -800x600 / @2x / -large ...（纯数字序号如 _01 不算）
+_RENDITION_SUFFIX_RE = re.compile(
+    r"(?:[-_@.](?:\d{2,5}(?:w|px)|\d{2,5}x\d{2,5}|[1-4](?:\.\d)?x"
+    r"|small|medium|large|xlarge|thumb|thumbnail|preview|full|original))+$",
+    re.I
+)
+# TYPO3 处理后的图片：csm_<原文件名>_<10 位 hash>
+_TYPO3_CSM_RE = re.compile(r"^csm_(.+)_[0-9a-f]{10}$", re.I)
+_WIDTH_HINT_RE = re.compile(r"[-_@.](\d{2,5})(?:w|px)(?=[-_@.]|$)|[-_@.](\d{2,5})x\d{2,5}(?=[-_@.]|$)", re.I)
+_SIZE_WORDS = {"thumb": 150, "thumbnail": 150, "small": 400, "preview": 600, "medium": 800, "large": 1600,
+               "xlarge": 2400, "full": 4000, "original": 5000}
+_SIZE_PARAMS = ("size", "usage", "w", "width", "h", "height", "maxw", "maxh", "q", "quality")
+
+
+def _image_asset_path(u: str):
+    """返回 (素材路径, 来源)：代理 URL 从 query 里找真正的文件路径"""
+    parts = urlsplit(u)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if "eID=tx_solr_image" in u or "eID=" in parts.query:
+        for _, v in query:
+            if IMG_EXT_RE.search(v) or "projects_pim" in v or "fileadmin" in v:
+                inner = urlsplit(v).path
+                return (inner if inner.startswith("/") else "/" + inner), "proxy"
+        rest = sorted((k, v) for k, v in query if k.lower() not in _SIZE_PARAMS)
+        return parts.path + "?" + "&".join(f"{k}={v}" for k, v in rest), "proxy"
+    if "/_processed_/" in parts.path:
+        return parts.path, "processed"
+    return parts.path, "original"
+
+
+def _image_canonical_key(u: str):
+    """
+    -> (key, TYPO3 原文件名 | None)
+    key = 完整路径（目录 + 文件名 + 扩展名）去掉已知的 rendition 标记：srcset 尺寸后缀、代理包装；
+    目录或扩展名不同的图片永远不会被视为同一素材
+    TYPO3 _processed_/csm_<name>_<hash> 的目录与原图不同，额外返回 <name>.<ext> 供 canonicalize_images 配对
+    """
+    path, _ = _image_asset_path(u)
+    if "?" in path:
+        return path, None
+
+    folder, name = os.path.split(path.lower())
+    stem, ext = os.path.splitext(name)
+    m = _TYPO3_CSM_RE.match(stem)
+    if m:
+        original = _RENDITION_SUFFIX_RE.sub("", m.group(1)) + ext
+        return "csm:" + original, original
+    return f"{folder}/{_RENDITION_SUFFIX_RE.sub('', stem)}{ext}", None
+
+
+def _image_preference(u: str):
+    """
+    越大越优先：原图 > TYPO3 处理图 > 代理；
+    原图里没有任何尺寸提示的（foo.jpg）就是原始文件，排在带尺寸标记的 rendition（foo-1150w.jpg）之前；
+    其余同类按尺寸提示
+    """
+    path, kind = _image_asset_path(u)
+    rank = {"original": 2, "processed": 1, "proxy": 0}[kind]
+
+    width = 0
+    for k, v in parse_qsl(urlsplit(u).query):
+        k = k.lower()
+        if k in ("w", "width", "maxw") and v.isdigit():
+            width = max(width, int(v))
+        elif k == "size":
+            width = max(width, _SIZE_WORDS.get(v.lower(), int(v) if v.isdigit() else 0))
+
+    stem = os.path.splitext(os.path.basename(urlsplit(u).path))[0].lower()
+    for a, b in _WIDTH_HINT_RE.findall(stem):
+        width = max(width, int(a or b))
+    for word, w in _SIZE_WORDS.items():
+        if stem.endswith(("-" + word, "_" + word)):
+            width = max(width, w)
+    if re.search(r"@[2-4]x$", stem):
+        width = max(width, 2000)
+
+    return rank, kind == "original" and width == 0, width
+
+
+def canonicalize_images(images: list):
+    """
+    把指向同一素材的 URL（srcset 各尺寸、og:image、solr 代理、TYPO3 _processed_）归为一组，
+    每组只留最优 rendition（位置取该组第一次出现处），返回 (保留列表, 丢弃列表)
+    """
+    keys = [_image_canonical_key(u) for u in images]
+
+    # TYPO3 处理图：只有当列表里恰好一张原图的文件名（含扩展名）与之对应时才并入那张原图，
+    # 否则只和同名的其它处理图归为一组
+    by_name = defaultdict(set)
+    for key, original in keys:
+        if original is None and "?" not in key:
+            by_name[os.path.basename(key)].add(key)
+
+    groups = {}
+    order = []
+    for u, (key, original) in zip(images, keys):
+        if original is not None and len(by_name.get(original, ())) == 1:
+            key = next(iter(by_name[original]))
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        groups[key].append(u)
+
+    kept, dropped = [], []
+    for key in order:
+        urls = groups[key]
+        best = max(urls, key=lambda x: (_image_preference(x), -urls.index(x)))
+        kept.append(best)
+        dropped.extend(x for x in urls if x != best)
+    return kept, dropped
+
+
 # ===================== 图片保存（修复 .php 扩展名问题） =====================
 
 def _ext_from_content_type(content_type: str) -> str:
@@ -565,146 +2425,1207 @@ def _ext_from_content_type(content_type: str) -> str:
     return mapping.get(ct, ".jpg")
 
 
-def download_image(url, headers):
-    r = requests.get(url, headers=headers, timeout=30)
-    r.raise_for_status()
-    return r.content, r.headers.get("Content-Type", "")
+IMAGE_CHUNK_SIZE = 64 * 1024
+_RESUMABLE_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+def _expected_total(status, resp_headers, offset) -> int:
+    """
+    下载完成后文件应有的总字节数；拿不到时返回 -1（无法校验）
+    - 206：Content-Range: bytes a-b/total
+    - 200：Content-Length
+    """
+    if status == 206:
+        m = re.search(r"/(\d+)\s*$", resp_headers.get("Content-Range", "") or "")
+        if m:
+            return int(m.group(1))
+        length = resp_headers.get("Content-Length")
+        return offset + int(length) if length and length.isdigit() else -1
+    length = resp_headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else -1
+
+
+def _is_partial(path) -> bool:
+    return path.endswith((".part", ".part.meta"))
+
+
+def _existing_image(folder, i):
+    # .part / .part.meta 是未完成的下载，不算已存在
+    for path in glob.glob(f'{folder}/image_{i}.*'):
+        if not _is_partial(path):
+            return path
+    return None
+
+
+def image_part_path(folder, i, url):
+    # .part 按 URL 哈希命名：同一序号换了 URL（重排/替换）也不会续上别的文件
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+    return f"{folder}/image_{i}.{key}.part"
+
+
+def _finish_image(part_path, folder, i, content_type):
+    ext = _ext_from_content_type(content_type)
+    path = f"{folder}/image_{i}{ext}"
+    os.replace(part_path, path)
+    # 同一序号下其他 URL 留下的残片已无用
+    for stale in glob.glob(f"{folder}/image_{i}.*"):
+        if _is_partial(stale):
+            os.remove(stale)
+    return path
+
+
+# ===================== 续传校验（.part 旁存 ETag / Last-Modified） =====================
+
+def _part_meta_path(part_path):
+    return part_path + ".meta"
+
+
+def _drop_part_meta(part_path):
+    meta_path = _part_meta_path(part_path)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+
+def _discard_part(part_path):
+    if os.path.exists(part_path):
+        os.remove(part_path)
+    _drop_part_meta(part_path)
+
+
+def _save_part_meta(part_path, url, resp_headers):
+    meta = {
+        "url": url,
+        "etag": resp_headers.get("ETag"),
+        "last_modified": resp_headers.get("Last-Modified"),
+    }
+    with open(_part_meta_path(part_path), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def _load_part_meta(part_path, url):
+    try:
+        with open(_part_meta_path(part_path), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if isinstance(meta, dict) and meta.get("url") == url else None
+
+
+def _if_range_value(meta):
+    # If-Range 只接受强 ETag；弱 ETag（W/"..."）只能退回 Last-Modified
+    etag = meta.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return meta.get("last_modified")
+
+
+def _resume_request(url, headers, part_path):
+    """
+    准备一次下载请求，返回 (请求头, 续传起点, 旧校验信息)
+    - .part 没有可用校验器（无 .meta / URL 不符 / 源站没给 ETag 和 Last-Modified）：
+      无法证明是同一个文件，丢弃后从头下，避免把两份文件的字节拼在一起
+    - 有校验器：Range + If-Range，源文件变了服务端会直接回 200 全量
+    """
+    # 图片本身已压缩：identity 保证 Content-Length 与落盘字节一致，Range 才有意义
+    h = dict(headers, **{"Accept-Encoding": "identity"})
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    meta = _load_part_meta(part_path, url) if offset else None
+    validator = _if_range_value(meta) if meta else None
+    if offset and not validator:
+        _discard_part(part_path)
+        offset = 0
+    if offset:
+        h["Range"] = f"bytes={offset}-"
+        h["If-Range"] = validator
+    return h, offset, meta
+
+
+def _resume_offset(status, resp_headers, offset, meta) -> int:
+    """
+    按响应决定写入起点：返回 offset 表示追加，0 表示从头覆盖
+    206 还要核对 Content-Range 起点和 ETag，不一致一律当作新文件（调用方随后会重新请求）
+    """
+    if not offset or status != 206:
+        return 0
+    m = re.match(r"\s*bytes\s+(\d+)-", resp_headers.get("Content-Range", "") or "")
+    if not m or int(m.group(1)) != offset:
+        return -1
+    etag = resp_headers.get("ETag")
+    if etag and meta.get("etag") and etag != meta["etag"]:
+        return -1
+    return offset
+
+
+def download_image_to_file(url, headers, part_path, attempts=4):
+    """
+    流式下载到 part_path（内存占用与图片大小无关）：
+    - part_path 已有内容时用 Range + If-Range 续传（校验器存在 part_path.meta）；
+      服务端返回 200 / 校验器对不上则丢弃旧内容从头写
+    - 传输中断自动续传；完成后按 Content-Length / Content-Range 校验大小
+    返回 Content-Type
+    """
+    for attempt in range(attempts):
+        h, offset, meta = _resume_request(url, headers, part_path)
+
+        try:
+            r = http_get(url, h, 30, stream=True)
+        except requests.HTTPError as e:
+            if offset and e.response is not None and e.response.status_code == 416:
+                # 本地 .part 与远端不匹配：丢弃重下
+                _discard_part(part_path)
+                continue
+            raise
+
+        with r:
+            offset = _resume_offset(r.status_code, r.headers, offset, meta)
+            if offset < 0:
+                _discard_part(part_path)
+                continue
+            if not offset:
+                _save_part_meta(part_path, url, r.headers)
+            expected = _expected_total(r.status_code, r.headers, offset)
+            content_type = r.headers.get("Content-Type", "")
+            try:
+                with open(part_path, "ab" if offset else "wb") as f:
+                    for chunk in r.iter_content(IMAGE_CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+            except _RESUMABLE_ERRORS:
+                if attempt + 1 >= attempts:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+
+        size = os.path.getsize(part_path)
+        if expected < 0 or size == expected:
+            _drop_part_meta(part_path)
+            return content_type
+        if size > expected:
+            _discard_part(part_path)
+        if attempt + 1 >= attempts:
+            raise IOError(f"size mismatch for {url}: got {size}, expected {expected}")
+
+    raise IOError(f"download failed for {url}")
+
+
+# ===================== 内容寻址图片库（按 sha256 去重 + URL 清单） =====================
+
+class ImageStore:
+    """
+    图片只按内容存一份：
+    - <root>/blobs/<ab>/<sha256><ext>：实际文件
+    - <root>/manifest.json：{url: {"sha256", "ext", "size"}}，URL -> 内容 O(1) 查找
+    - 项目目录里的 image_i<ext> 是指向 blob 的硬链接（不支持硬链接时退化为复制）
+    同一 URL 只下载一次；不同 URL 内容相同只存一份
+    """
+
+    def __init__(self, root, save_every=50):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.manifest = load_json(self.manifest_path, {})
+        self.save_every = save_every
+        self._dirty = 0
+        self._lock = threading.Lock()
+        self._url_locks = [threading.Lock() for _ in range(64)]
+        self._async_locks = {}
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+
+    def _blob_path(self, entry) -> str:
+        h = entry["sha256"]
+        return os.path.join(self.root, "blobs", h[:2], f"{h}{entry['ext']}")
+
+    def lock_for(self, url):
+        return self._url_locks[hash(url) % len(self._url_locks)]
+
+    def async_lock_for(self, url):
+        # 只在事件循环线程里调用，无需加锁
+        lock = self._async_locks.get(url)
+        if lock is None:
+            lock = self._async_locks[url] = asyncio.Lock()
+        return lock
+
+    def lookup(self, url):
+        entry = self.manifest.get(url)
+        if not entry:
+            return None
+        path = self._blob_path(entry)
+        return path if os.path.exists(path) else None
+
+    def part_path(self, url) -> str:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, "tmp", f"{key}.part")
+
+    def _ingest(self, url, src_path, ext, move: bool) -> str:
+        h = hashlib.sha256()
+        with open(src_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        entry = {"sha256": h.hexdigest(), "ext": ext, "size": os.path.getsize(src_path)}
+        dest = self._blob_path(entry)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+        if os.path.exists(dest):
+            if move:
+                os.remove(src_path)
+        elif move:
+            os.replace(src_path, dest)
+        else:
+            _link_or_copy(src_path, dest)
+
+        with self._lock:
+            self.manifest[url] = entry
+            self._dirty += 1
+            flush = self._dirty >= self.save_every
+        if flush:
+            self.save()
+        return dest
+
+    def commit(self, url, part_path, content_type) -> str:
+        """下载完成的 .part -> 按内容入库（已有相同内容则直接丢弃 .part）"""
+        return self._ingest(url, part_path, _ext_from_content_type(content_type), move=True)
+
+    def adopt(self, url, path) -> str:
+        """把旧版目录里已下载的 image_i.* 收进库（不重新下载）"""
+        return self._ingest(url, path, os.path.splitext(path)[1] or ".jpg", move=False)
+
+    def link(self, blob, folder, i) -> str:
+        path = f"{folder}/image_{i}{os.path.splitext(blob)[1]}"
+        if os.path.exists(path):
+            try:
+                if os.path.samefile(path, blob):
+                    return path
+            except OSError:
+                pass
+        # 顺序变化 / 扩展名变化：清掉旧的 image_i.*
+        for old in glob.glob(f"{folder}/image_{i}.*"):
+            os.remove(old)
+        _link_or_copy(blob, path)
+        return path
+
+    def save(self):
+        with self._lock:
+            snapshot = dict(self.manifest)
+            self._dirty = 0
+        save_json(self.manifest_path, snapshot)
+
+
+def _link_or_copy(src, dest):
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+_image_store = None
+
+
+def configure_image_store(root):
+    global _image_store
+    _image_store = ImageStore(root) if root else None
+    return _image_store
+
 
+def image_store():
+    return _image_store
 
-def save_images(data, output_dir, headers):
+
+def legacy_images(previous) -> dict:
+    """
+    旧记录里 (序号, URL) -> 本地文件
+    image_i.* 本身不记来源：只有旧记录的 Images / Local Images 能证明它是哪个 URL 下载的
+    """
+    if not previous:
+        return {}
+    urls = previous.get("Images") or []
+    paths = previous.get("Local Images") or []
+    return {(i, url): path for i, (url, path) in enumerate(zip(urls, paths), 1) if url and path}
+
+
+def _legacy_image(folder, i, url, legacy):
+    """
+    旧版（非库内）下载的 image_i.*，满足以下条件才收进库：
+    - 旧记录确认第 i 张就是这个 URL、且落在这个文件（顺序变了就重新下载，避免把错图永久入库）
+    - 硬链接数为 1：库里链接出来的文件可能属于别的 URL
+    """
+    recorded = legacy.get((i, url)) if legacy else None
+    path = _existing_image(folder, i)
+    if not (recorded and path and os.path.normpath(recorded) == os.path.normpath(path)):
+        return None
+    if os.stat(path).st_nlink == 1:
+        return path
+    return None
+
+
+def project_image_folder(data, output_dir):
     folder = f'{output_dir}/{sanitize_name(data["Title"])}'
     os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def save_one_image(folder, i, img, headers, legacy=None):
+    store = image_store()
+    if store is not None:
+        return _save_one_image_stored(store, folder, i, img, headers, legacy)
+
+    # 如果 image_i.* 已存在，就复用（避免重复下载）
+    existed = _existing_image(folder, i)
+    if existed:
+        return existed
+
+    # 先写 image_i.<url哈希>.part，校验完整后原子 rename 成最终文件
+    part_path = image_part_path(folder, i, img)
+    content_type = download_image_to_file(img, headers, part_path)
+    return _finish_image(part_path, folder, i, content_type)
+
+
+def _save_one_image_stored(store, folder, i, img, headers, legacy=None):
+    blob = store.lookup(img)
+    if blob is None:
+        with store.lock_for(img):
+            blob = store.lookup(img)
+            if blob is None:
+                adoptable = _legacy_image(folder, i, img, legacy)
+                if adoptable:
+                    blob = store.adopt(img, adoptable)
+                else:
+                    part_path = store.part_path(img)
+                    content_type = download_image_to_file(img, headers, part_path)
+                    blob = store.commit(img, part_path, content_type)
+    return store.link(blob, folder, i)
+
+
+def needs_images(data) -> bool:
+    """
+    ✅ 如果 Images 为空，没必要下载本地图片（省时间/带宽）：直接记 Local Images = [] 并返回 False
+    threads / async / pipeline 三个引擎共用
+    """
+    if isinstance(data.get("Images"), list) and len(data["Images"]) > 0:
+        return True
+    data["Local Images"] = []
+    return False
 
-    local_images = []
 
-    for i, img in enumerate(data["Images"], 1):
+def save_images(data, output_dir, headers, previous=None):
+    """previous：该 URL 已保存的旧记录（用于确认旧版 image_i.* 能否直接收进图片库）"""
+    folder = project_image_folder(data, output_dir)
+    legacy = legacy_images(previous)
+    return [save_one_image(folder, i, img, headers, legacy) for i, img in enumerate(data["Images"], 1)]
+
+
+# ===================== asyncio 引擎（aiohttp，详情页 + 图片全并发） =====================
+
+async def _aio_get(session, url, headers, timeout, retries=3):
+    """GET 并返回 (bytes, headers, status)；与 http_get 共用全局限速器，连接错误 / 429 / 5xx 退避重试"""
+    import aiohttp
+
+    limiter = rate_limiter()
+    for attempt in range(retries + 1):
+        wait = limiter.reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        try:
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+                if r.status in RETRY_STATUSES:
+                    retry_after = parse_retry_after(r.headers.get("Retry-After"))
+                    limiter.on_error(url, retry_after)
+                    if attempt < retries:
+                        await asyncio.sleep(max(retry_after, backoff_delay(attempt)))
+                        continue
+                else:
+                    limiter.on_success(url)
+                r.raise_for_status()
+                return await r.read(), r.headers, r.status
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt >= retries:
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+
+
+async def save_images_async(session, data, output_dir, headers, image_sem, retries=3, previous=None):
+    """与 save_images 相同的目录/命名/复用规则，但一个项目的所有图片并发下载"""
+    folder = project_image_folder(data, output_dir)
+
+    store = image_store()
+    legacy = legacy_images(previous)
+
+    async def one_stored(i, img):
+        blob = store.lookup(img)
+        if blob is None:
+            async with store.async_lock_for(img):
+                blob = store.lookup(img)
+                if blob is None:
+                    adoptable = _legacy_image(folder, i, img, legacy)
+                    if adoptable:
+                        blob = await asyncio.to_thread(store.adopt, img, adoptable)
+                    else:
+                        part_path = store.part_path(img)
+                        async with image_sem:
+                            content_type = await _aio_download_to_file(session, img, headers, part_path, retries)
+                        blob = await asyncio.to_thread(store.commit, img, part_path, content_type)
+        return store.link(blob, folder, i)
+
+    async def one(i, img):
+        if store is not None:
+            return await one_stored(i, img)
+
         # 如果 image_i.* 已存在，就复用（避免重复下载）
-        existed = glob.glob(f'{folder}/image_{i}.*')
+        existed = _existing_image(folder, i)
         if existed:
-            local_images.append(existed[0])
+            return existed
+
+        part_path = image_part_path(folder, i, img)
+        async with image_sem:
+            content_type = await _aio_download_to_file(session, img, headers, part_path, retries)
+        return _finish_image(part_path, folder, i, content_type)
+
+    return list(await asyncio.gather(*(one(i, img) for i, img in enumerate(data["Images"], 1))))
+
+
+async def _aio_download_to_file(session, url, headers, part_path, retries=3):
+    """download_image_to_file 的 aiohttp 版本：流式写盘 + Range/If-Range 续传 + 大小校验，共用全局限速器"""
+    import aiohttp
+
+    limiter = rate_limiter()
+    for attempt in range(retries + 1):
+        h, offset, meta = _resume_request(url, headers, part_path)
+
+        wait = limiter.reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        try:
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=30)
+            async with session.get(url, headers=h, timeout=timeout) as r:
+                if r.status == 416 and offset:
+                    _discard_part(part_path)
+                    continue
+                if r.status in RETRY_STATUSES:
+                    retry_after = parse_retry_after(r.headers.get("Retry-After"))
+                    limiter.on_error(url, retry_after)
+                    if attempt < retries:
+                        await asyncio.sleep(max(retry_after, backoff_delay(attempt)))
+                        continue
+                else:
+                    limiter.on_success(url)
+                r.raise_for_status()
+
+                offset = _resume_offset(r.status, r.headers, offset, meta)
+                if offset < 0:
+                    _discard_part(part_path)
+                    continue
+                if not offset:
+                    _save_part_meta(part_path, url, r.headers)
+                expected = _expected_total(r.status, r.headers, offset)
+                content_type = r.headers.get("Content-Type", "")
+                with open(part_path, "ab" if offset else "wb") as f:
+                    async for chunk in r.content.iter_chunked(IMAGE_CHUNK_SIZE):
+                        f.write(chunk)
+        except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt >= retries:
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
             continue
 
-        content, content_type = download_image(img, headers)
-        ext = _ext_from_content_type(content_type)
+        size = os.path.getsize(part_path)
+        if expected < 0 or size == expected:
+            _drop_part_meta(part_path)
+            return content_type
+        if size > expected:
+            _discard_part(part_path)
+        if attempt >= retries:
+            raise IOError(f"size mismatch for {url}: got {size}, expected {expected}")
+
+    raise IOError(f"download failed for {url}")
+
+
+async def crawl_async(
+    todo_urls,
+    headers,
+    base_url,
+    output_dir,
+    on_result,
+    on_error,
+    page_concurrency=8,
+    image_concurrency=64,
+    detail_delay=0,
+    retries=3,
+    html_cache=None,
+    parser="bs4",
+    on_start=None,
+    has_record=None,
+    previous=None
+):
+    """
+    --engine async：
+    - page_sem 限制同时抓取的详情页数；image_sem 限制同时下载的图片数（所有项目共享）
+    - 解析放到线程里，避免阻塞事件循环
+    - on_result / on_error 在事件循环所在的主线程里按完成顺序回调（合并语义与线程引擎一致）
+    - html_cache：条件 GET，304 时 on_result 收到 data=None
+      has_record(url) 为 False 的 URL（还没有保存成功的记录）不发条件请求，总是重新解析
+    - previous(url)：已保存的旧记录，用来确认旧版 image_i.* 能否收进图片库
+    - on_start(url)：真正开始抓取某个 URL 时回调（crawl frontier 记 in-flight）
+    """
+    try:
+        import aiohttp
+    except ImportError:
+        raise SystemExit("❌ --engine async 需要 aiohttp：pip install aiohttp")
+
+    page_sem = asyncio.Semaphore(max(1, page_concurrency))
+    image_sem = asyncio.Semaphore(max(1, image_concurrency))
+    connector = aiohttp.TCPConnector(limit=page_concurrency + image_concurrency, ttl_dns_cache=300)
+    req_headers = dict(headers, **{"Accept-Encoding": ACCEPT_ENCODING})
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+
+        async def worker(url):
+            async with page_sem:
+                if on_start is not None:
+                    on_start(url)
+                print(f"🔎 正在爬取：{url}")
+                revalidate = html_cache is not None and (has_record is None or has_record(url))
+                cond = html_cache.conditional_headers(url) if revalidate else {}
+                body, resp_headers, status = await _aio_get(session, url, dict(req_headers, **cond), 20, retries)
+                if status == 304 and cond:
+                    # 页面未变化：复用缓存，跳过解析
+                    return url, None
+                raw_text = body.decode("utf-8", errors="replace")
+                if html_cache is not None:
+                    await asyncio.to_thread(html_cache.store, url, raw_text, resp_headers)
+                data = await asyncio.to_thread(parse_project_html, raw_text, url, base_url, parser)
+                if detail_delay and detail_delay > 0:
+                    await asyncio.sleep(detail_delay)
+
+            if needs_images(data):
+                data["Local Images"] = await save_images_async(
+                    session, data, output_dir, req_headers, image_sem, retries,
+                    previous(url) if previous is not None else None
+                )
+            return url, data
+
+        async def guarded(url):
+            try:
+                return await worker(url)
+            except Exception as e:
+                return url, e
+
+        tasks = [asyncio.create_task(guarded(url)) for url in todo_urls]
+        for fut in tqdm(asyncio.as_completed(tasks), total=len(tasks)):
+            url, data = await fut
+            if isinstance(data, Exception):
+                on_error(url, data)
+            else:
+                on_result(url, data)
+
+
+# ===================== 分阶段流水线（fetch -> parse -> image -> persist） =====================
+
+_STOP = object()
+
+
+class _ProjectImages:
+    """一个项目在图片阶段的进度：所有图片完成（或任一失败）后整体交给 persist"""
+
+    def __init__(self, url, data, folder, legacy=None):
+        self.url = url
+        self.data = data
+        self.folder = folder
+        self.legacy = legacy
+        self.paths = [None] * len(data["Images"])
+        self.remaining = len(data["Images"])
+        self.error = None
+        self.lock = threading.Lock()
+
+    def done(self, i, path=None, error=None) -> bool:
+        with self.lock:
+            if error is not None and self.error is None:
+                self.error = error
+            if path is not None:
+                self.paths[i - 1] = path
+            self.remaining -= 1
+            return self.remaining == 0
+
+
+def run_pipeline(
+    todo_urls,
+    headers,
+    base_url,
+    output_dir,
+    on_result,
+    on_error,
+    fetch_workers=8,
+    parse_workers=2,
+    image_workers=16,
+    detail_delay=0,
+    html_cache=None,
+    parser="bs4",
+    stats_interval=10,
+    on_start=None,
+    has_record=None,
+    previous=None
+):
+    """
+    --engine pipeline：四个阶段各自的线程数 + 有界队列（背压，内存有上限）
+    - fetch：下载详情页 HTML（含条件 GET）
+    - parse：解析成项目 dict
+    - image：按“单张图片”调度，一个图片多的项目不会占住抓页面的槽位
+    - persist：主线程回调 on_result / on_error（合并语义与线程引擎一致）
+    每 stats_interval 秒打印各队列深度，便于判断瓶颈在哪个阶段
+    on_start(url) 在 fetch 线程里开始抓取某个 URL 时回调（需线程安全）
+    has_record(url) 为 False 的 URL 不发条件请求（同 crawl_async）；previous(url) 同 crawl_async
+    """
+    url_q = queue.Queue(maxsize=max(1, fetch_workers) * 2)
+    parse_q = queue.Queue(maxsize=max(1, parse_workers) * 4)
+    image_q = queue.Queue(maxsize=max(1, image_workers) * 4)
+    persist_q = queue.Queue(maxsize=64)
+
+    queues = (("fetch", url_q), ("parse", parse_q), ("image", image_q), ("persist", persist_q))
+    finished = threading.Event()
+
+    def feeder():
+        for url in todo_urls:
+            url_q.put(url)
+
+    def fetch_stage():
+        for url in iter(url_q.get, _STOP):
+            try:
+                if on_start is not None:
+                    on_start(url)
+                revalidate = has_record is None or has_record(url)
+                raw_text, changed = fetch_project_html(url, headers, html_cache, revalidate)
+                if changed:
+                    parse_q.put((url, raw_text))
+                else:
+                    persist_q.put((url, None))
+            except Exception as e:
+                persist_q.put((url, e))
+            if detail_delay and detail_delay > 0:
+                time.sleep(detail_delay)
 
-        path = f"{folder}/image_{i}{ext}"
-        with open(path, "wb") as f:
-            f.write(content)
+    def parse_stage():
+        for url, raw_text in iter(parse_q.get, _STOP):
+            try:
+                data = parse_project_html(raw_text, url, base_url, parser)
+            except Exception as e:
+                persist_q.put((url, e))
+                continue
 
-        local_images.append(path)
+            if not needs_images(data):
+                persist_q.put((url, data))
+                continue
 
-    return local_images
+            try:
+                old = previous(url) if previous is not None else None
+                state = _ProjectImages(url, data, project_image_folder(data, output_dir), legacy_images(old))
+            except Exception as e:
+                persist_q.put((url, e))
+                continue
+            for i, img in enumerate(data["Images"], 1):
+                image_q.put((state, i, img))
 
+    def image_stage():
+        for state, i, img in iter(image_q.get, _STOP):
+            try:
+                last = state.done(i, path=save_one_image(state.folder, i, img, headers, state.legacy))
+            except Exception as e:
+                last = state.done(i, error=e)
+            if last:
+                if state.error is not None:
+                    persist_q.put((state.url, state.error))
+                else:
+                    state.data["Local Images"] = state.paths
+                    persist_q.put((state.url, state.data))
+
+    def start(target, n):
+        threads = [threading.Thread(target=target, daemon=True) for _ in range(max(1, n))]
+        for t in threads:
+            t.start()
+        return threads
+
+    def drain(threads, q):
+        # 上游全部结束后，给本阶段每个线程一个 STOP
+        for _ in threads:
+            q.put(_STOP)
+        for t in threads:
+            t.join()
+
+    def supervisor():
+        feed = start(feeder, 1)
+        fetchers = start(fetch_stage, fetch_workers)
+        parsers = start(parse_stage, parse_workers)
+        imagers = start(image_stage, image_workers)
+
+        for t in feed:
+            t.join()
+        drain(fetchers, url_q)
+        drain(parsers, parse_q)
+        drain(imagers, image_q)
+        persist_q.put(_STOP)
+
+    def monitor():
+        while not finished.wait(stats_interval):
+            depths = " ".join(f"{name}={q.qsize()}/{q.maxsize}" for name, q in queues)
+            tqdm.write(f"📊 队列深度 {depths}")
+
+    threading.Thread(target=supervisor, daemon=True).start()
+    if stats_interval and stats_interval > 0:
+        threading.Thread(target=monitor, daemon=True).start()
 
-# ===================== 主入口（多线程加速详情抓取） =====================
+    try:
+        with tqdm(total=len(todo_urls)) as bar:
+            for url, result in iter(persist_q.get, _STOP):
+                bar.update(1)
+                if isinstance(result, Exception):
+                    on_error(url, result)
+                else:
+                    on_result(url, result)
+    finally:
+        finished.set()
 
-def main():
-    args = parse_args()
 
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0 Safari/537.36"
-        )
-    }
+# ===================== 离线重解析（进程池，无网络） =====================
 
-    base_url = "https://www.red-dot.org"
-    os.makedirs(args.output_dir, exist_ok=True)
+def _reparse_one(task):
+    """子进程：读取归档 HTML -> 解析；返回 (url, data | None, error)"""
+    url, body_path, base_url, parser = task
+    try:
+        with gzip.open(body_path, "rb") as f:
+            raw_text = f.read().decode("utf-8")
+        return url, parse_project_html(raw_text, url, base_url, parser), ""
+    except Exception as e:
+        return url, None, repr(e)
 
-    projects_path = f'{args.output_dir}/projects.json'
-    search_cache_path = f'{args.output_dir}/search_pages.json'
 
-    # ✅ 启动时：先清理历史 projects.json 中不合规项
-    cleanup_projects_json(projects_path)
+def reparse_projects(output_dir, base_url, processes=None, parser="bs4"):
+    """
+    用 html_cache 里归档的页面重新跑 parse_project_html（不联网），原地重建 projects.json：
+    - 已有项目：覆盖 Title/Year/Category/Description，保留 Local Images；
+      Images 与旧记录不同时保留旧 Images（两个列表必须按序号对齐），并在 frontier 里记为需要整页重抓
+    - 新变成合规的项目：不写进 projects.json（没有图片的记录之后不会再被补图），
+      而是在 frontier 里记为 pending，下次 `--resume` 或正常运行时按新项目完整抓取（含图片）
+    - 解析结果不合规（can_save=False）：保留旧数据
+    HTML 解析是 CPU 密集型，线程会被 GIL 串行化，这里用 ProcessPoolExecutor
+    """
+    projects_path = f"{output_dir}/projects.json"
+    html_cache = HtmlCache(f"{output_dir}/html_cache")
 
-    # ✅ 读取已有数据，并建立 url -> index 的映射，方便覆盖更新
-    projects = load_json(projects_path, [])
-    url_to_idx = {p.get("Project URL"): i for i, p in enumerate(projects) if p.get("Project URL")}
+    projects = ProjectStore(projects_path)
+    frontier = CrawlFrontier(f"{output_dir}/frontier.jsonl")
 
-    def is_empty_desc(p: dict) -> bool:
-        desc = p.get("Description", "")
-        return (desc is None) or (str(desc).strip() == "")
+    tasks = [(url, body_path, base_url, parser) for url, body_path in html_cache.iter_urls()]
+    if not tasks:
+        print(f"⚠️ 没有归档 HTML：{html_cache.root}")
+        projects.close()
+        frontier.close()
+        return
 
-    # ✅ 写盘过滤：只有 Description + Images 都非空，才允许保存
-    def can_save(data: dict) -> bool:
-        desc = (data.get("Description") or "").strip()
-        imgs = data.get("Images", [])
-        if not desc:
-            return False
-        if (not isinstance(imgs, list)) or (len(imgs) == 0):
-            return False
-        return True
+    updated = queued = requeued = skipped = failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, processes or 1)) as ex:
+        results = ex.map(_reparse_one, tasks, chunksize=32)
+        for url, data, err in tqdm(results, total=len(tasks)):
+            if data is None:
+                failed += 1
+                print("❌ 失败:", url, err)
+                continue
+            if not can_save(data):
+                skipped += 1
+                continue
 
-    print("🔎 分页收集项目链接（带缓存）...")
-    links = collect_project_links_with_cache(
-        args.search_url,
-        args.max_pages,
-        args.page_wait,
-        args.headless,
-        headers["User-Agent"],
-        search_cache_path
-    )
+            old = projects.get(url)
+            if old is None:
+                frontier.enqueue([url])
+                queued += 1
+                continue
+            if data["Images"] != (old.get("Images") or []):
+                # Local Images 与 Images 按序号一一对应（legacy_images 靠它认领旧文件）：
+                # 图片列表变了就只更新文字字段，整页（含图片）留给下次抓取
+                data["Images"] = old.get("Images") or []
+                frontier.enqueue([url], refetch=True)
+                requeued += 1
+            data["Local Images"] = old.get("Local Images") or []
+            projects.put(data)
+            updated += 1
+
+    projects.close()
+    frontier.close()
+    print(f"✅ 重解析完成：更新 {updated}，不合规保留旧数据 {skipped}，失败 {failed}")
+    if queued:
+        print(f"⏯️ {queued} 个新合规项目已记为 pending，运行 python main.py --resume 抓取（含图片）")
+    if requeued:
+        print(f"⏯️ {requeued} 个项目的图片列表有变化，只更新了文字字段；运行 python main.py --resume 重新抓取图片")
+
+
+# ===================== 缩略图（WebP，进程池） =====================
+
+THUMB_DIR = "_thumbs"
+THUMB_QUALITY = 80
+
+
+def thumbnail_path(output_dir, image_path, width) -> str:
+    """
+    <output_dir>/_thumbs/<项目目录>/image_1-640.webp
+    app.py 的 /thumbs/<width>/<path> 按同样的规则查找，两边需保持一致
+    """
+    rel = os.path.relpath(image_path, output_dir)
+    return os.path.join(output_dir, THUMB_DIR, os.path.splitext(rel)[0] + f"-{width}.webp")
+
+
+def _thumbnail_source_path(output_dir, image_path) -> str:
+    """<output_dir>/_thumbs/<项目目录>/image_1.src.json：记录生成缩略图时原图的 inode / 大小 / mtime"""
+    rel = os.path.relpath(image_path, output_dir)
+    return os.path.join(output_dir, THUMB_DIR, os.path.splitext(rel)[0] + ".src.json")
+
+
+def _thumbnail_signature(st) -> list:
+    # image_i.* 可能被重新硬链接到一个 mtime 更早的 blob（或 copy2 保留了旧 mtime）：
+    # 只比 mtime 会误判为“未过期”，inode / 大小一变就必须重做
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def _read_thumbnail_signature(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _thumbnail_one(task):
+    """子进程：解码一次原图，按宽度从大到小生成各尺寸（不放大），返回 (src, 生成数, error)"""
+    src, targets = task
+    try:
+        from PIL import Image
+
+        with Image.open(src) as im:
+            widest = max(w for w, _ in targets)
+            im.draft("RGB", (widest, max(1, im.height * widest // im.width)))   # JPEG 直接按缩小比例解码
+            im = im.convert("RGBA" if im.mode in ("RGBA", "LA", "P") else "RGB")
+            for width, dst in sorted(targets, reverse=True):
+                if im.width > width:
+                    im = im.resize((width, max(1, round(im.height * width / im.width))), Image.LANCZOS)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                tmp_path = dst + f".{os.getpid()}.tmp"
+                im.save(tmp_path, "WEBP", quality=THUMB_QUALITY, method=4)
+                os.replace(tmp_path, dst)
+        return src, len(targets), ""
+    except Exception as e:
+        return src, 0, repr(e)
+
+
+def make_thumbnails(output_dir, image_paths, widths, processes=None):
+    """
+    为 image_paths 生成 WebP 缩略图（每张图 len(widths) 个尺寸）
+    - 增量：缩略图都存在、且原图的 inode / 大小 / mtime 与上次生成时记录的一致（旁边的 .src.json）
+      才跳过；原图变了（包括重新硬链接到另一个 blob）就重做所有尺寸
+    - 解码 + 缩放是 CPU 密集型，用 ProcessPoolExecutor
+    """
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        raise SystemExit("❌ 生成缩略图需要 Pillow：pip install pillow")
 
-    print(f"✅ 共得到 {len(links)} 个唯一项目链接")
+    tasks = []
+    signatures = {}
+    for src in dict.fromkeys(image_paths):
+        try:
+            signature = _thumbnail_signature(os.stat(src))
+        except OSError:
+            continue
+        targets = [(w, thumbnail_path(output_dir, src, w)) for w in widths]
+        sig_path = _thumbnail_source_path(output_dir, src)
+        if _read_thumbnail_signature(sig_path) == signature:
+            targets = [(w, dst) for w, dst in targets if not os.path.exists(dst)]
+        if targets:
+            tasks.append((src, targets))
+            signatures[src] = (sig_path, signature)
+
+    if not tasks:
+        print("✅ 缩略图都是最新的")
+        return
 
-    # ✅ 只处理：不存在 或 Description 为空 的 URL（保持你原逻辑兼容）
-    todo_urls = [
-        url for url in links
-        if (url not in url_to_idx) or is_empty_desc(projects[url_to_idx[url]])
+    made = failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, processes or 1)) as ex:
+        for src, n, err in tqdm(ex.map(_thumbnail_one, tasks, chunksize=8), total=len(tasks)):
+            if err:
+                failed += 1
+                print("❌ 缩略图失败:", src, err)
+            else:
+                sig_path, signature = signatures[src]
+                save_json(sig_path, signature)
+            made += n
+    print(f"✅ 生成 {made} 个缩略图（{len(tasks)} 张图片），失败 {failed} 张")
+
+
+def project_image_paths(projects) -> list:
+    """所有项目 Local Images 里实际存在的文件"""
+    return [
+        path
+        for p in projects.all()
+        for path in (p.get("Local Images") or [])
+        if path and os.path.exists(path)
     ]
 
+
+# ===================== 主入口（多线程加速详情抓取） =====================
+
+def crawl_details(todo_urls, args, headers, base_url, projects, frontier, html_cache):
+    """按 --engine 抓取详情页 + 图片；结果写入 projects，状态写入 frontier"""
+
+    def has_record(url: str) -> bool:
+        # 只有已保存记录的 URL 才做条件 GET：304 才能放心地沿用旧数据
+        # reparse 标记了 refetch 的项目记录里是旧 Images，必须整页重抓
+        return url in projects and not frontier.wants_refetch(url)
+
     def worker(url: str):
+        frontier.start(url)
         print(f"🔎 正在爬取：{url}")
-        data = extract_project_data(url, headers, base_url)
+        data = extract_project_data(url, headers, base_url, html_cache, args.parser, conditional=has_record(url))
+        if data is None:
+            return url, None
 
-        # ✅ 如果 Images 为空，没必要下载本地图片（省时间/带宽）
-        if isinstance(data.get("Images"), list) and len(data["Images"]) > 0:
-            data["Local Images"] = save_images(data, args.output_dir, headers)
-        else:
-            data["Local Images"] = []
+        if needs_images(data):
+            data["Local Images"] = save_images(data, args.output_dir, headers, projects.get(url))
 
         if args.detail_delay and args.detail_delay > 0:
             time.sleep(args.detail_delay)
         return url, data
 
-    saved_since_last = 0
-    save_every = 5  # 每完成 N 个写一次 projects.json（可调）
+    def handle_result(url: str, data: dict):
+        frontier.done(url)
+
+        # ⏸️ 条件 GET 返回 304：页面未变化，沿用已有数据
+        if data is None:
+            print(f"⏸️ 未变化（304），跳过解析: {url}")
+            return
+
+        # 🚫 如果本次爬下来的 Description 或 Images 为空：不保存、不覆盖旧数据
+        if not can_save(data):
+            print(f"⏭️ 跳过（Description/Images 为空，不保存）: {url}")
+            return
+
+        # ✅ 主线程合并/覆盖：每个项目只追加一行日志
+        projects.put(data)
+
+    def handle_error(url: str, e: Exception):
+        frontier.fail(url, e)
+        print("❌ 失败:", url, e)
+
+    if args.engine == "async":
+        asyncio.run(crawl_async(
+            todo_urls,
+            headers,
+            base_url,
+            args.output_dir,
+            handle_result,
+            handle_error,
+            page_concurrency=args.workers,
+            image_concurrency=args.image_concurrency,
+            detail_delay=args.detail_delay,
+            retries=args.http_retries,
+            html_cache=html_cache,
+            parser=args.parser,
+            on_start=frontier.start,
+            has_record=has_record,
+            previous=projects.get
+        ))
+    elif args.engine == "pipeline":
+        run_pipeline(
+            todo_urls,
+            headers,
+            base_url,
+            args.output_dir,
+            handle_result,
+            handle_error,
+            fetch_workers=args.workers,
+            parse_workers=args.parse_workers,
+            image_workers=args.image_workers,
+            detail_delay=args.detail_delay,
+            html_cache=html_cache,
+            parser=args.parser,
+            stats_interval=args.stats_interval,
+            on_start=frontier.start,
+            has_record=has_record,
+            previous=projects.get
+        )
+    else:
+        with ThreadPoolExecutor(max_workers=args.workers) as ex:
+            futures = {ex.submit(worker, url): url for url in todo_urls}
+
+            for fut in tqdm(as_completed(futures), total=len(futures)):
+                url = futures[fut]
+                try:
+                    url, data = fut.result()
+                    handle_result(url, data)
+                except Exception as e:
+                    handle_error(url, e)
+
+
+def retry_failed(args, headers, base_url, projects, frontier, html_cache):
+    """
+    retry-failed：只重放 frontier 里 failed 的 URL
+    - 每个 URL 距上次失败满 CrawlFrontier.retry_due 的退避时间才重试，没到点就等
+    - 累计失败 --max-attempts 次的 URL 放弃（保留在 frontier 里，错误信息可查）
+    """
+    while True:
+        failed = [frontier.get(u) for u in frontier.urls("failed")]
+        failed = [rec for rec in failed if rec["attempts"] < args.max_attempts]
+        if not failed:
+            break
+
+        now = time.time()
+        due = [rec["url"] for rec in failed if frontier.retry_due(rec) <= now]
+        if not due:
+            wait = min(frontier.retry_due(rec) for rec in failed) - now
+            print(f"⏳ {len(failed)} 个失败 URL 还在退避中，{wait:.0f}s 后重试")
+            time.sleep(wait)
+            continue
+
+        print(f"🔁 重试 {len(due)} 个失败 URL")
+        crawl_details(due, args, headers, base_url, projects, frontier, html_cache)
+
+    gave_up = frontier.urls("failed")
+    if gave_up:
+        print(f"⚠️ {len(gave_up)} 个 URL 已失败 {args.max_attempts} 次，放弃：")
+        for url in gave_up:
+            print("   ", url, "➜", frontier.get(url)["error"])
+    else:
+        print("✅ 没有失败的 URL")
+
+
+def main(argv=None):
+    args = parse_args(argv)
 
-    if not todo_urls:
-        print("✅ 无需更新：所有项目 Description 都已存在")
+    headers = {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/120.0 Safari/537.36"
+        )
+    }
+
+    base_url = "https://www.red-dot.org"
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    if args.command == "reparse":
+        reparse_projects(args.output_dir, base_url, args.processes, args.parser)
         return
 
-    with ThreadPoolExecutor(max_workers=args.workers) as ex:
-        futures = {ex.submit(worker, url): url for url in todo_urls}
+    if args.command == "thumbs":
+        projects = ProjectStore(f"{args.output_dir}/projects.json")
+        make_thumbnails(args.output_dir, project_image_paths(projects), args.thumb_widths, args.processes)
+        return
 
-        for fut in tqdm(as_completed(futures), total=len(futures)):
-            url = futures[fut]
-            try:
-                url, data = fut.result()
+    # ✅ keep-alive 连接池：大小跟随并发（详情 worker + 搜索页并发，多分片时按分片数放大）
+    search_concurrency = args.browsers * max(1, min(args.shard_workers, len(args.facet)))
+    configure_http_session(
+        pool_size=max(args.workers + args.image_workers, search_concurrency),
+        retries=args.http_retries
+    )
+    # ✅ 全局按 host 限速：详情页 + 图片 + HTTP 搜索页共享
+    configure_rate_limiter(args.rate, args.min_rate, args.max_rate)
 
-                # 🚫 如果本次爬下来的 Description 或 Images 为空：不保存、不覆盖旧数据
-                if not can_save(data):
-                    print(f"⏭️ 跳过（Description/Images 为空，不保存）: {url}")
-                    continue
+    projects_path = f'{args.output_dir}/projects.json'
+    search_cache_path = f'{args.output_dir}/search_pages.json'
 
-                # ✅ 主线程合并/覆盖
-                if url in url_to_idx:
-                    projects[url_to_idx[url]] = data
-                else:
-                    url_to_idx[url] = len(projects)
-                    projects.append(data)
+    # ✅ 读取已有数据（快照 + 追加日志），按 Project URL 覆盖更新
+    projects = ProjectStore(projects_path)
+
+    # ✅ 启动时：先清理历史 projects.json 中不合规项
+    cleanup_projects_json(projects)
 
-                saved_since_last += 1
-                if saved_since_last >= save_every:
-                    save_json(projects_path, projects)
-                    saved_since_last = 0
+    # ✅ 每个详情页 URL 的抓取状态（pending / in_flight / done / failed）
+    frontier = CrawlFrontier(f"{args.output_dir}/frontier.jsonl")
 
-            except Exception as e:
-                print("❌ 失败:", url, e)
+    html_cache = None if args.no_html_cache else HtmlCache(f"{args.output_dir}/html_cache")
+    store = configure_image_store(None if args.no_image_store else f"{args.output_dir}/_image_store")
 
-    # 收尾保存
-    save_json(projects_path, projects)
+    try:
+        if args.command == "retry-failed":
+            retry_failed(args, headers, base_url, projects, frontier, html_cache)
+            return
+
+        resumable = frontier.urls("pending") if args.resume else []
+        if resumable:
+            # ⏯️ 上次中断：直接接着抓剩下的 URL，不再翻搜索页
+            todo_urls = resumable
+            print(f"⏯️ 继续上次未完成的抓取：{len(todo_urls)} 个 URL（{frontier.counts()}）")
+        else:
+            if args.resume:
+                print("⚠️ frontier 中没有未完成的 URL，按正常流程运行")
+
+            def is_empty_desc(p: dict) -> bool:
+                desc = p.get("Description", "")
+                return (desc is None) or (str(desc).strip() == "")
+
+            print("🔎 分页收集项目链接（带缓存）...")
+            collector_kwargs = dict(
+                backend=args.search_backend,
+                page_timeout=args.page_timeout,
+                known_urls=set(projects.urls()) if args.incremental else None,
+                stop_after=args.stop_after,
+                cache_ttl=args.cache_ttl,
+                fresh_pages=args.fresh_pages,
+                split_pages=args.split_pages,
+                split_field=args.split_field
+            )
+            if args.facet:
+                # 🧩 多分片：同一进程并发收集，共享浏览器池 / 限速器 / 连接池，跨分片去重
+                links = collect_project_links_sharded(
+                    [parse_facet(spec, args.search_url, args.max_pages) for spec in args.facet],
+                    f"{args.output_dir}/search_shards",
+                    args.headless,
+                    headers["User-Agent"],
+                    browsers=args.browsers,
+                    lean=args.lean,
+                    shard_workers=args.shard_workers,
+                    page_wait=args.page_wait,
+                    **collector_kwargs
+                )
+            else:
+                links = collect_project_links_with_cache(
+                    args.search_url,
+                    args.max_pages,
+                    args.page_wait,
+                    args.headless,
+                    headers["User-Agent"],
+                    search_cache_path,
+                    browsers=args.browsers,
+                    lean=args.lean,
+                    shard_workers=args.shard_workers,
+                    **collector_kwargs
+                )
+
+            print(f"✅ 共得到 {len(links)} 个唯一项目链接")
+
+            # ✅ 只处理：不存在 或 Description 为空 的 URL（保持你原逻辑兼容）
+            #    --refresh：全部重抓（配合 HTML 缓存的条件 GET，未变化的页面只是一次 304）
+            todo_urls = [
+                url for url in links
+                if args.refresh or (url not in projects) or is_empty_desc(projects.get(url))
+            ]
+            frontier.enqueue(todo_urls)
+
+        if not todo_urls:
+            print("✅ 无需更新：所有项目 Description 都已存在")
+            return
+
+        crawl_details(todo_urls, args, headers, base_url, projects, frontier, html_cache)
+
+        failed = frontier.urls("failed")
+        if failed:
+            print(f"⚠️ {len(failed)} 个 URL 抓取失败，可运行 `python main.py retry-failed` 只重试它们")
+
+        if args.thumbnails:
+            # 🖼️ 增量：只有本次新下载 / 变化的图片会真正生成
+            make_thumbnails(args.output_dir, project_image_paths(projects), args.thumb_widths, os.cpu_count())
+    finally:
+        # 收尾：合并日志，导出完整 projects.json
+        projects.close()
+        frontier.close()
+        if store is not None:
+            store.save()
 
 
 if __name__ == "__main__":
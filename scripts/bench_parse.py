@@ -0,0 +1,130 @@
+# 详情页解析微基准 + 一致性校验：单次遍历 parse_project_page vs 旧的多次遍历实现（从 git 历史加载）
+# 用法：
+#   python scripts/bench_parse.py --html-cache data/html_cache --limit 500
+#   python scripts/bench_parse.py --files "pages/*.html" --repeat 3
+#   python scripts/gen_pages.py --out /tmp/pages && python scripts/bench_parse.py --files "/tmp/pages/*.html"
+#   python scripts/bench_parse.py --files "pages/*.html" --baseline-rev HEAD~5
+# 基准默认取 git merge-base HEAD origin/main（当前分支开始之前的上游代码）；
+# 已合并到 main 之后 merge-base 就是当前代码，请用 --baseline-rev 指定单次遍历改写之前的提交
+import os
+import sys
+import json
+import time
+import types
+import argparse
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from bs4 import BeautifulSoup
+
+from main import parse_project_page
+from corpus import BASE_URL, load_corpus
+
+# ===================== 旧实现（多次遍历，作为基准与对照） =====================
+
+# 旧的 main.py 直接从 git 历史里加载，不在仓库里复制一份旧代码；
+# 不钉死某个 SHA（rebase / squash 合并后就不存在了），按上游分支的分叉点解析
+DEFAULT_UPSTREAM = "origin/main"
+
+
+def resolve_baseline_rev(rev=None) -> str:
+    """--baseline-rev 解析成提交 SHA；不传时取 git merge-base HEAD origin/main"""
+    if rev:
+        cmd = ["git", "-C", REPO_DIR, "rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}"]
+        what = rev
+    else:
+        cmd = ["git", "-C", REPO_DIR, "merge-base", "HEAD", DEFAULT_UPSTREAM]
+        what = f"merge-base HEAD {DEFAULT_UPSTREAM}"
+    try:
+        return subprocess.run(cmd, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        raise SystemExit(
+            f"❌ 无法解析基准版本（{what}）：请用 --baseline-rev 指定单次遍历改写之前的提交，例如 --baseline-rev HEAD~5"
+        )
+
+
+def load_baseline(rev):
+    """
+    git show <rev>:main.py，作为独立模块执行，返回与 parse_project_page 同签名的解析函数
+    - 已有 parse_project_page 的版本直接用它
+    - 更早的版本在 extract_project_data 里自己联网取页面（模块级 get_soup），这里把 get_soup 换成直接返回已解析好的页面
+    """
+    try:
+        source = subprocess.run(
+            ["git", "-C", REPO_DIR, "show", f"{rev}:main.py"],
+            capture_output=True, text=True, encoding="utf-8", check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        raise SystemExit(f"❌ 无法从 git 读取基准实现 {rev}:main.py（需要完整的 git 历史）: {e}")
+    module = types.ModuleType("baseline_main")
+    module.__file__ = f"{rev}:main.py"
+    exec(compile(source, module.__file__, "exec"), module.__dict__)
+    if hasattr(module, "parse_project_page"):
+        return module.parse_project_page
+    if not hasattr(module, "get_soup"):
+        raise SystemExit(f"❌ {rev}:main.py 既没有 parse_project_page 也没有 get_soup，无法作为基准")
+
+    def parse(soup, raw_text, url, base_url):
+        module.get_soup = lambda _url, _headers: (soup, raw_text)
+        return module.extract_project_data(url, {}, base_url)
+
+    return parse
+
+
+# ===================== 基准 =====================
+
+def bench(fn, soups, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for url, soup, raw_text in soups:
+            fn(soup, raw_text, url, BASE_URL)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / max(1, len(soups))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single-pass vs multi-pass detail parsing")
+    parser.add_argument("--html-cache", default="", help="html_cache directory written by main.py")
+    parser.add_argument("--files", default="", help="Glob of saved project .html files")
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--baseline-rev",
+        default="",
+        help=f"git revision whose main.py is the multi-pass baseline (default: git merge-base HEAD {DEFAULT_UPSTREAM})"
+    )
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.html_cache, args.files, args.limit)
+    if not corpus:
+        raise SystemExit("❌ 没有页面：请指定 --html-cache 或 --files")
+    baseline_rev = resolve_baseline_rev(args.baseline_rev)
+    print(f"baseline: {baseline_rev[:12]}")
+    parse_project_page_multipass = load_baseline(baseline_rev)
+
+    # 只测解析（DOM 构建不计入）
+    soups = [(url, BeautifulSoup(raw_text, "lxml"), raw_text) for url, raw_text in corpus]
+
+    mismatches = 0
+    for url, soup, raw_text in soups:
+        old = parse_project_page_multipass(soup, raw_text, url, BASE_URL)
+        new = parse_project_page(soup, raw_text, url, BASE_URL)
+        if old != new:
+            mismatches += 1
+            diff = {k: (old.get(k), new.get(k)) for k in old if old.get(k) != new.get(k)}
+            print(f"⚠️ 不一致: {url}\n{json.dumps(diff, ensure_ascii=False, indent=2)}")
+
+    t_old = bench(parse_project_page_multipass, soups, args.repeat)
+    t_new = bench(parse_project_page, soups, args.repeat)
+
+    print(f"pages: {len(soups)}  mismatches: {mismatches}")
+    print(f"multi-pass : {t_old * 1000:.2f} ms/page")
+    print(f"single-pass: {t_new * 1000:.2f} ms/page  ({t_old / t_new:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
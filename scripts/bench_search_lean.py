@@ -0,0 +1,54 @@
+# 对比普通模式 / lean 模式下 Selenium 搜索页的单页耗时
+# 用法：python scripts/bench_search_lean.py --pages 5 --headless
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import create_chrome_driver, fetch_search_page_selenium, summarize_load_times
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0 Safari/537.36"
+)
+
+parser = argparse.ArgumentParser(description="Benchmark lean vs normal Selenium search pages")
+parser.add_argument(
+    "--search-url",
+    default="https://www.red-dot.org/search?solr%5Bfilter%5D%5B%5D=meta_categories%3A%2F11%2F",
+)
+parser.add_argument("--pages", type=int, default=5)
+parser.add_argument("--page-timeout", type=float, default=15)
+parser.add_argument("--headless", action="store_true")
+args = parser.parse_args()
+
+
+def run(lean: bool) -> dict:
+    driver = create_chrome_driver(args.headless, USER_AGENT, lean=lean)
+    stats = []
+    try:
+        # 第 1 页先热身（driver 启动/首屏缓存不计入）
+        fetch_search_page_selenium(driver, f"{args.search_url}&solr%5Bpage%5D=1", args.page_timeout, lean=lean)
+        for page in range(2, args.pages + 2):
+            page_url = f"{args.search_url}&solr%5Bpage%5D={page}"
+            start = time.monotonic()
+            urls = fetch_search_page_selenium(driver, page_url, args.page_timeout, lean=lean)
+            stats.append({"Page": page, "Seconds": time.monotonic() - start, "Links": len(urls)})
+    finally:
+        driver.quit()
+    return summarize_load_times(stats)
+
+
+normal = run(lean=False)
+lean = run(lean=True)
+
+print(f"{'mode':<8}{'pages':>6}{'avg(s)':>9}{'p95(s)':>9}{'max(s)':>9}")
+for name, s in (("normal", normal), ("lean", lean)):
+    print(f"{name:<8}{s['count']:>6}{s['avg']:>9}{s['p95']:>9}{s['max']:>9}")
+
+if normal["avg"]:
+    saved = normal["avg"] - lean["avg"]
+    print(f"lean 每页节省 {saved:.3f}s（{saved / normal['avg'] * 100:.1f}%）")
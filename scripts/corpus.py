@@ -0,0 +1,29 @@
+# bench_parse.py / parser_parity.py 共用的语料加载：html_cache 归档 + 本地保存的 .html 文件
+import os
+import sys
+import glob
+import gzip
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import HtmlCache
+
+BASE_URL = "https://www.red-dot.org"
+
+
+def load_corpus(html_cache="", files="", limit=0) -> list:
+    """
+    返回 [(url, html)]：
+    - html_cache：main.py 写入的 html_cache 目录（URL 取自索引）
+    - files：glob（支持 **），URL 按文件名拼成 <BASE_URL>/project/<文件名>
+    limit > 0 时只取前 limit 个
+    """
+    corpus = []
+    if html_cache:
+        for url, body_path in HtmlCache(html_cache).iter_urls():
+            with gzip.open(body_path, "rb") as f:
+                corpus.append((url, f.read().decode("utf-8")))
+    for path in sorted(glob.glob(files or "", recursive=True)):
+        with open(path, "r", encoding="utf-8") as f:
+            corpus.append((f"{BASE_URL}/project/{os.path.basename(path)}", f.read()))
+    return corpus[:limit] if limit else corpus
@@ -0,0 +1,78 @@
+# 生成随机的“类 Red Dot 详情页”语料，供 bench_parse.py / parser_parity.py 使用（可复现：固定 --seed）
+# 覆盖解析器关心的各种结构：srcset / data-src / <source> / eID 代理图、JSON-LD、meta 图与描述、
+# breadcrumb、Back/Download、Jury 分界、Others interested too（文本和注释）、各处散落的年份
+# 用法：
+#   python scripts/gen_pages.py --out /tmp/pages --count 300
+#   python scripts/bench_parse.py --files "/tmp/pages/*.html"
+import os
+import random
+import argparse
+
+FRAGMENTS = [
+    '<img src="/fileadmin/user_upload/projects/a{n}.jpg" srcset="/x/a{n}_s.jpg 300w, /x/a{n}_l.jpg 900w">',
+    '<img data-src="//cdn.red-dot.org/projects_pim/2024/b{n}.png">',
+    '<source srcset="/img/c{n}.webp 1x, /img/c{n}@2x.webp 2x">',
+    '<a href="/index.php?eID=tx_solr_image&usage=slider&id={n}">s</a>',
+    '<a href="/project/other-{n}">other</a>',
+    '<a href="https://x.org/files/2023PD_{n}.jpg">f</a>',
+    '<p>Some long descriptive text number {n} that goes on and on about the product design, materials, ergonomics and more.</p>',
+    '<p>Short {n}</p>',
+    '<div>Back Download</div>',
+    '<h2>Others interested too</h2>',
+    '<!-- Others interested too -->',
+    '<p>Statement by the Jury</p>',
+    '<script>var y=2019;</script>',
+    '<span>Copyright 2011 TYPO3</span>',
+    '<p>Founded 1955</p>',
+    '<div class="breadcrumb"><a>Home</a><a>Product {n}</a></div>',
+    '<div class="project-description"><p>Desc block {n} text.</p></div>',
+    '<script type="application/ld+json">{{"image":["/fileadmin/user_upload/ld{n}.jpg",{{"url":"/ld/u{n}.png"}}]}}</script>',
+    '<h1>Title {n}</h1>',
+]
+
+
+def _tree(rng, depth):
+    out = []
+    for _ in range(rng.randint(1, 5)):
+        if depth < 3 and rng.random() < 0.3:
+            out.append("<div>" + _tree(rng, depth + 1) + "</div>")
+        else:
+            out.append(rng.choice(FRAGMENTS).format(n=rng.randint(0, 99)))
+    return "".join(out)
+
+
+def generate_page(rng, i) -> str:
+    head = (
+        '<head><meta name="date" content="2001-01-01">'
+        + rng.choice(["", f'<meta property="og:image" content="/fileadmin/user_upload/og{i}.jpg">'])
+        + rng.choice(["", f'<meta name="description" content="Meta desc {i}">'])
+        + rng.choice(["", '<meta property="og:description" content="OG desc">'])
+        + "</head>"
+    )
+    pre = _tree(rng, 1) if rng.random() < 0.5 else ""
+    main_open, main_close = rng.choice([("<main>", "</main>"), ('<main class="m">', "</main>"), ("", "")])
+    body = (
+        "<body><header>" + pre + "</header>"
+        + main_open + _tree(rng, 0) + main_close
+        + "<footer>" + _tree(rng, 2) + "</footer></body>"
+    )
+    return "<!DOCTYPE html><html>" + head + body + "</html>"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a reproducible corpus of synthetic project pages")
+    parser.add_argument("--out", required=True, help="Output directory for p<i>.html")
+    parser.add_argument("--count", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    rng = random.Random(args.seed)
+    for i in range(args.count):
+        with open(os.path.join(args.out, f"p{i}.html"), "w", encoding="utf-8") as f:
+            f.write(generate_page(rng, i))
+    print(f"✅ 生成 {args.count} 个页面 ➜ {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,32 @@
-import subprocess
+import os
+import sys
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as crawler
+
+# 不带 year 过滤的搜索 URL；每个年份作为一个 facet 分片
 base_url = (
     "https://www.red-dot.org/search?"
     "solr%5Bfilter%5D%5B%5D=meta_categories%3A%2F11%2F"
-    "&solr%5Bfilter%5D%5B%5D=year%3A"
 )
 
+# 页数不再手填：每个年份从第 1 页自动识别，过大的年份按分类自动拆分
 subsets = [
-    {
-        'year': 2023,
-        'max-pages': 58,
-    },
-    {
-        'year': 2024,
-        'max-pages': 188,
-    },
-    {
-        'year': 2025,
-        'max-pages': 191,
-    },
+    {'year': 2023},
+    {'year': 2024},
+    {'year': 2025},
 ]
 
+# ✅ 所有年份在同一进程里并发收集：共享 Chrome 池 / 限速器 / 连接池，跨年份重复的项目只抓一次
+# 额外参数原样透传给 main.py，例如：python scripts/grab_by_year.py --browsers 4 --engine async
+argv = [
+    "--search-url", base_url,
+    "--output-dir", "data_grab_by_year",
+    "--max-pages", "auto",
+]
 for subset in subsets:
-    year = subset['year']
-    max_pages = subset['max-pages']
-    print(f"Grabbing projects from year {year}...")
+    argv += ["--facet", f"year:{subset['year']}"]
 
-    subprocess.run([
-        "python", "main.py",
-        "--search-url", f"{base_url}{year}",
-        "--output-dir", f"data_grab_by_year/{year}",
-        "--max-pages", str(max_pages)
-    ], check=True)
+print(f"Grabbing projects from years {', '.join(str(s['year']) for s in subsets)} ({len(subsets)} facets)...")
+crawler.main(argv + sys.argv[1:])
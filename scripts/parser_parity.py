@@ -0,0 +1,70 @@
+# 解析后端一致性校验：同一批已保存的 Red Dot 详情页，分别用 bs4 / lxml 后端解析并逐字段对比
+# 用法：
+#   python scripts/parser_parity.py --html-cache data/html_cache
+#   python scripts/parser_parity.py --files "pages/*.html" --show 5
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import PARSER_BACKENDS
+from corpus import BASE_URL, load_corpus
+
+FIELDS = ("Title", "Year", "Category", "Description", "Images")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff project dicts produced by two parser backends")
+    parser.add_argument("--html-cache", default="", help="html_cache directory written by main.py")
+    parser.add_argument("--files", default="", help="Glob of saved project .html files")
+    parser.add_argument("--baseline", default="bs4", choices=sorted(PARSER_BACKENDS))
+    parser.add_argument("--candidate", default="lxml", choices=sorted(PARSER_BACKENDS))
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--show", type=int, default=10, help="Print at most N mismatching pages")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.html_cache, args.files, args.limit)
+    if not corpus:
+        raise SystemExit("❌ 没有页面：请指定 --html-cache 或 --files")
+
+    base_fn = PARSER_BACKENDS[args.baseline]
+    cand_fn = PARSER_BACKENDS[args.candidate]
+
+    field_mismatch = {k: 0 for k in FIELDS}
+    mismatched_pages = 0
+    t_base = t_cand = 0.0
+
+    for url, raw_text in corpus:
+        start = time.perf_counter()
+        a = base_fn(raw_text, url, BASE_URL)
+        t_base += time.perf_counter() - start
+
+        start = time.perf_counter()
+        b = cand_fn(raw_text, url, BASE_URL)
+        t_cand += time.perf_counter() - start
+
+        diff = {k: {args.baseline: a.get(k), args.candidate: b.get(k)} for k in FIELDS if a.get(k) != b.get(k)}
+        if not diff:
+            continue
+
+        mismatched_pages += 1
+        for k in diff:
+            field_mismatch[k] += 1
+        if mismatched_pages <= args.show:
+            print(f"⚠️ {url}\n{json.dumps(diff, ensure_ascii=False, indent=2)}")
+
+    n = len(corpus)
+    print(f"pages: {n}  mismatched: {mismatched_pages}")
+    for k in FIELDS:
+        print(f"  {k:<12}{field_mismatch[k]}")
+    print(f"{args.baseline:<6}: {t_base / n * 1000:.2f} ms/page")
+    print(f"{args.candidate:<6}: {t_cand / n * 1000:.2f} ms/page  ({t_base / max(t_cand, 1e-9):.2f}x)")
+
+    sys.exit(1 if mismatched_pages else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# bs4（_PageScan）与 lxml（_LxmlPageScan）两个解析后端必须输出完全相同的项目 dict
+# 运行：python -m pytest -q
+import os
+import sys
+import random
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+from main import PARSER_BACKENDS
+from corpus import BASE_URL, load_corpus
+from gen_pages import generate_page
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def _assert_same(url, raw_text):
+    expected = PARSER_BACKENDS["bs4"](raw_text, url, BASE_URL)
+    actual = PARSER_BACKENDS["lxml"](raw_text, url, BASE_URL)
+    assert actual == expected, url
+
+
+@pytest.mark.parametrize(
+    "url, raw_text",
+    load_corpus(files=os.path.join(FIXTURES, "*.html")),
+    ids=lambda v: os.path.basename(v) if v.startswith("http") else "",
+)
+def test_fixture_parity(url, raw_text):
+    _assert_same(url, raw_text)
+
+
+def test_generated_parity():
+    rng = random.Random(1)
+    for i in range(100):
+        _assert_same(f"{BASE_URL}/project/p{i}.html", generate_page(rng, i))
+
+
+def test_reddot_fixture_fields():
+    path = os.path.join(FIXTURES, "reddot_project.html")
+    with open(path, "r", encoding="utf-8") as f:
+        data = PARSER_BACKENDS["lxml"](f.read(), f"{BASE_URL}/project/buzzard40", BASE_URL)
+
+    assert data["Title"] == "Buzzard40"
+    assert data["Year"] == "2024"
+    assert data["Description"].startswith("The Buzzard40 is a cordless leaf blower")
+    assert data["Images"]
+    # "Others interested too" 之后的推荐项目不算本项目的图片
+    assert not any("other_lamp" in u for u in data["Images"])